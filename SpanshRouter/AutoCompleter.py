@@ -2,11 +2,13 @@ import json
 import logging
 import os
 import queue
+import sys
 import threading
 import traceback
 from tkinter import *
 
-import requests
+from SpanshRouter.HttpClient import http_client
+from SpanshRouter.Metrics import metrics
 from SpanshRouter.PlaceHolder import PlaceHolder
 
 from config import appname
@@ -17,14 +19,24 @@ logger = logging.getLogger(f'{appname}.{plugin_name}')
 
 
 class AutoCompleter(PlaceHolder):
-    def __init__(self, parent, placeholder, **kw):
+    # Wait that long after the last keystroke before querying Spansh
+    debounce_ms = 250
+
+    def __init__(self, parent, placeholder, cache=None, index=None, **kw):
 
         self.parent = parent
+        self.cache = cache
+        self.index = index
 
         self.lb = Listbox(self.parent, selectmode=SINGLE, **kw)
         self.lb_up = False
         self.has_selected = False
         self.queue = queue.Queue()
+        # Every input change gets a new sequence number, only results for the latest one are shown
+        self.seq = 0
+        self.debounce_id = None
+        self.pending = queue.Queue()
+        self.worker = None
 
         PlaceHolder.__init__(self, parent, placeholder, **kw)
         self.var.traceid = self.var.trace('w', self.changed)
@@ -80,16 +92,45 @@ class AutoCompleter(PlaceHolder):
 
     def changed(self, name=None, index=None, mode=None):
         value = self.var.get()
+        self.seq += 1
+        if self.debounce_id is not None:
+            self.after_cancel(self.debounce_id)
+            self.debounce_id = None
+
         if value.__len__() < 3 and self.lb_up or self.has_selected:
             self.hide_list()
             self.has_selected = False
         else:
-            t = threading.Thread(target=self.query_systems, args=[value])
-            t.start()
+            self.debounce_id = self.after(self.debounce_ms, self.dispatch, self.seq, value)
+
+    def dispatch(self, seq, value):
+        self.debounce_id = None
+        if self.worker is None:
+            self.worker = threading.Thread(target=self.work, name="SpanshRouter-autocomplete", daemon=True)
+            self.worker.start()
+        self.pending.put((seq, value))
+
+    def work(self):
+        while True:
+            seq, value = self.pending.get()
+            # Only the latest query matters, drop the ones that piled up behind it
+            try:
+                while 1:
+                    seq, value = self.pending.get_nowait()
+            except queue.Empty:
+                pass
+
+            if seq != self.seq:
+                continue
+
+            lista = self.query_systems(value)
+            if lista and seq == self.seq:
+                self.write(lista, seq)
 
     def selection(self, event=None):
         if self.lb_up:
             self.has_selected = True
+            self.seq += 1
             index = self.lb.curselection()
             self.var.trace_vdelete("w", self.var.traceid)
             self.var.set(self.lb.get(index))
@@ -153,38 +194,52 @@ class AutoCompleter(PlaceHolder):
     def query_systems(self, inp):
         inp = inp.strip()
         if inp != self.placeholder and inp.__len__() >= 3:
+            # The offline index answers without the network when it knows the system
+            if self.index:
+                lista = self.index.lookup(inp)
+                if lista:
+                    metrics.count("systems.index_hits")
+                    return lista
+
+            if self.cache:
+                lista = self.cache.get(inp)
+                if lista is not None:
+                    metrics.count("systems.cache_hits")
+                    return lista
+
+            metrics.count("systems.queries")
             url = "https://spansh.co.uk/api/systems?"
             try:
-                results = requests.get(url,
-                                       params={'q': inp},
-                                       headers={'User-Agent': "EDMC_SpanshRouter 1.0"},
-                                       timeout=3)
+                results = http_client.get("systems", url, params={'q': inp})
 
                 lista = json.loads(results.content)
-                if lista:
-                    self.write(lista)
+                if self.cache and results.status_code == 200:
+                    self.cache.put(inp, lista)
+                return lista
             except:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
                 lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
                 logger.warning(''.join('!! ' + line for line in lines))
 
-    def write(self, lista):
-        self.queue.put(lista)
+    def write(self, lista, seq):
+        self.queue.put((seq, lista))
 
     def clear(self):
-        self.queue.put(None)
+        self.queue.put((self.seq, None))
 
     def update_me(self):
         try:
             while 1:
-                lista = self.queue.get_nowait()
-                self.show_results(lista)
-                self.update_idletasks()
+                seq, lista = self.queue.get_nowait()
+                if seq == self.seq:
+                    self.show_results(lista)
+                    self.update_idletasks()
         except queue.Empty:
             pass
         self.after(100, self.update_me)
 
     def set_text(self, text, placeholder_style=True):
+        self.seq += 1
         if placeholder_style:
             self['fg'] = self.placeholder_color
         else:
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import sys
+import traceback
+
+from config import appname
+
+# We need a name of plugin dir, not BodyClassifier.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class BodyClassifier():
+    # Lower-cased body subtype -> label shown in the bodies to scan
+    default_classes = {
+        "high metal content world": "Metal",
+        "rocky body": "Rocky",
+        "earth-like world": "Earth",
+        "water world": "Water",
+    }
+    unknown = "Unknown"
+
+    def __init__(self, path=None):
+        self.classes = dict(self.default_classes)
+        self.labels = list(dict.fromkeys(self.classes.values()))
+        if path is not None:
+            self.load(path)
+        self.labels.append(self.unknown)
+
+    def load(self, path):
+        # body_classes.json maps more subtypes to existing or new labels, e.g. {"Icy body": "Icy"}
+        try:
+            with open(path, 'r') as classes_fh:
+                extra_classes = json.load(classes_fh)
+        except IOError:
+            return
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            return
+
+        for subtype, label in extra_classes.items():
+            self.classes[subtype.lower()] = label
+            if label not in self.labels:
+                self.labels.append(label)
+
+    def summarize(self, system, body_names, body_subtypes):
+        bodies = {}
+        for name, subtype in zip(body_names, body_subtypes):
+            label = self.classes.get(subtype.lower(), self.unknown)
+            bodies.setdefault(label, []).append(name.replace(system + " ", ""))
+
+        text = f"\n{system}:"
+        for label in self.labels:
+            if label in bodies:
+                text += f"\n   {label}: " + ', '.join(bodies[label])
+        return text
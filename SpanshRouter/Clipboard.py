@@ -0,0 +1,87 @@
+import logging
+import os
+import sys
+import tkinter as tk
+import traceback
+from abc import ABC, abstractmethod
+
+from config import appname, config
+
+# We need a name of plugin dir, not Clipboard.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class Clipboard(ABC):
+    # Skips copies that wouldn't change anything, the backends only write
+    def __init__(self):
+        self.last_text = None
+        self.writes = 0
+        self.skipped = 0
+
+    def copy(self, text, force=False):
+        if not force and text == self.last_text and self.holds(text):
+            self.skipped += 1
+            return
+        try:
+            self.write(text)
+            self.last_text = text
+            self.writes += 1
+        except:
+            self.last_text = None
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+
+    def holds(self, text):
+        # Backends that can't read the clipboard back trust the last write
+        return True
+
+    @abstractmethod
+    def write(self, text):
+        pass
+
+
+class TkClipboard(Clipboard):
+    # EDMC's own Tk interpreter owns the selection for as long as it runs, nothing to spawn
+    def __init__(self, widget):
+        Clipboard.__init__(self)
+        self.widget = widget
+
+    def holds(self, text):
+        try:
+            # Served locally by Tk while we still own the selection
+            return self.widget.clipboard_get() == text
+        except tk.TclError:
+            return False
+
+    def write(self, text):
+        self.widget.clipboard_clear()
+        self.widget.clipboard_append(text)
+
+
+class CommandClipboard(Clipboard):
+    # A single helper process per change: xclip and wl-copy fork their own
+    # background owner, and we reap the launcher right away
+    commands = {
+        "xclip": ["xclip", "-selection", "clipboard"],
+        "xsel": ["xsel", "--clipboard", "--input"],
+        "wl-copy": ["wl-copy"],
+    }
+
+    def __init__(self, name):
+        Clipboard.__init__(self)
+        self.command = self.commands[name]
+
+    def write(self, text):
+        import subprocess
+        subprocess.run(self.command, input=text.encode('utf-8'), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       check=True, timeout=2)
+
+
+def create_clipboard(widget):
+    # Tk owns the clipboard by default, a helper command can still be forced through EDMC's config
+    name = config.get_str('SpanshRouter_clipboard') or "tk"
+    if name in CommandClipboard.commands:
+        return CommandClipboard(name)
+    return TkClipboard(widget)
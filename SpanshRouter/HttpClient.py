@@ -0,0 +1,135 @@
+import logging
+import os
+import random
+import threading
+from time import sleep
+
+from config import appname
+
+from .Metrics import metrics
+
+# We need a name of plugin dir, not HttpClient.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class HttpClient():
+    user_agent = "EDMC_SpanshRouter 1.0"
+
+    # (connect, read) timeouts in seconds for each kind of call we make
+    timeouts = {
+        "systems": (3, 3),
+        "route": (5, 10),
+        "results": (5, 5),
+        "version": (2, 2),
+        "changelog": (2, 5),
+        "download": (5, 30),
+    }
+    default_timeout = (5, 10)
+
+    retry_statuses = (429, 500, 502, 503, 504)
+    # A POST may have been processed when the server failed, only retry when we know it wasn't
+    retry_statuses_unsafe = (429, 503)
+    max_retries = 3
+    backoff_base = 0.5
+    backoff_max = 8
+
+    def __init__(self):
+        # requests takes longer to import than the rest of the plugin,
+        # so the session is only set up by the first call
+        self.session = None
+        self.adapter = None
+        self.lock = threading.Lock()
+        self.requests_sent = 0
+        self.retries = 0
+
+    def connect(self):
+        with self.lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.headers.update({
+                    'User-Agent': self.user_agent,
+                    'Accept-Encoding': 'gzip, deflate',
+                })
+                # One pool per host, enough connections for the autocompleters and a couple of plot jobs
+                self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("https://", self.adapter)
+                session.mount("http://", self.adapter)
+                self.session = session
+            return self.session
+
+    def get(self, endpoint, url, **kwargs):
+        return self.request("GET", endpoint, url, **kwargs)
+
+    def post(self, endpoint, url, **kwargs):
+        return self.request("POST", endpoint, url, **kwargs)
+
+    def request(self, method, endpoint, url, **kwargs):
+        session = self.connect()
+        import requests
+
+        kwargs.setdefault("timeout", self.timeouts.get(endpoint, self.default_timeout))
+        statuses = self.retry_statuses if method in ("GET", "HEAD") else self.retry_statuses_unsafe
+
+        attempt = 0
+        while True:
+            with self.lock:
+                self.requests_sent += 1
+            try:
+                with metrics.timer(f"http.{endpoint}"):
+                    response = session.request(method, url, **kwargs)
+            except requests.ConnectionError:
+                if method not in ("GET", "HEAD") or attempt >= self.max_retries:
+                    raise
+                response = None
+
+            if response is not None and (response.status_code not in statuses or attempt >= self.max_retries):
+                return response
+
+            delay = self.retry_delay(attempt, response)
+            logger.info(f"Retrying {endpoint} request in {delay:.1f}s ({'connection error' if response is None else response.status_code})")
+            if response is not None:
+                response.close()
+            with self.lock:
+                self.retries += 1
+            metrics.count(f"http.{endpoint}.retries")
+            attempt += 1
+            sleep(delay)
+
+    def retry_delay(self, attempt, response):
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(int(retry_after), self.backoff_max)
+        # Full jitter, so the autocompleters and plot jobs don't retry in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def stats(self):
+        new_connections = 0
+        pooled_requests = 0
+        if self.adapter is not None:
+            pools = self.adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    new_connections += pool.num_connections
+                    pooled_requests += pool.num_requests
+
+        return {
+            "requests": self.requests_sent,
+            "retries": self.retries,
+            "new_connections": new_connections,
+            "reused_connections": max(pooled_requests - new_connections, 0),
+        }
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+http_client = HttpClient()
+# New and reused connections show up in the metrics snapshots
+metrics.add_source("http", http_client.stats)
@@ -0,0 +1,119 @@
+import heapq
+
+import numpy as np
+
+
+class KDTree():
+    # A static k-d tree over an (n, k) array of points. Nodes live in flat lists
+    # and hold the bounding box of their points, which is what queries prune on.
+    # Points are numbered by their row in the array given to the constructor
+    def __init__(self, points, leaf_size=16):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.leaf_size = leaf_size
+        # Point numbers, reordered so every node covers a contiguous slice
+        self.order = np.arange(len(self.points))
+        self.start = []
+        self.end = []
+        self.low = []
+        self.high = []
+        # Highest point number below each node, to skip whole subtrees in nearest(min_index=...)
+        self.max_index = []
+        # Child nodes, -1 for leaves
+        self.left = []
+        self.right = []
+        if len(self.points):
+            self.build()
+        # As arrays, so queries can look at a whole level of the tree at once
+        self.start = np.array(self.start, dtype=np.int64)
+        self.end = np.array(self.end, dtype=np.int64)
+        self.low = np.array(self.low, dtype=np.float64).reshape(-1, self.points.shape[1])
+        self.high = np.array(self.high, dtype=np.float64).reshape(-1, self.points.shape[1])
+        self.max_index = np.array(self.max_index, dtype=np.int64)
+        self.left = np.array(self.left, dtype=np.int64)
+        self.right = np.array(self.right, dtype=np.int64)
+
+    def build(self):
+        stack = [(0, len(self.points), None, None)]
+        while stack:
+            start, end, parent, side = stack.pop()
+            node = len(self.start)
+            if parent is not None:
+                (self.left if side == 0 else self.right)[parent] = node
+
+            indices = self.order[start:end]
+            points = self.points[indices]
+            low = points.min(axis=0)
+            high = points.max(axis=0)
+            self.start.append(start)
+            self.end.append(end)
+            self.low.append(low)
+            self.high.append(high)
+            self.max_index.append(int(indices.max()))
+            self.left.append(-1)
+            self.right.append(-1)
+
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split the widest dimension at its median
+            dimension = int(np.argmax(high - low))
+            middle = (end - start) // 2
+            partition = np.argpartition(points[:, dimension], middle)
+            self.order[start:end] = indices[partition]
+            stack.append((start + middle, end, node, 1))
+            stack.append((start, start + middle, node, 0))
+
+    def box_distance(self, node, point):
+        gap = np.maximum(np.maximum(self.low[node] - point, point - self.high[node]), 0.0)
+        return float(np.sqrt(gap.dot(gap)))
+
+    def query_radius(self, point, radius):
+        # Numbers of the points within radius of point, in no particular order
+        point = np.asarray(point, dtype=np.float64)
+        found = []
+        nodes = np.zeros(1 if len(self.start) else 0, dtype=np.int64)
+        while len(nodes):
+            gap = np.maximum(np.maximum(self.low[nodes] - point, point - self.high[nodes]), 0.0)
+            nodes = nodes[np.einsum('ij,ij->i', gap, gap) <= radius * radius]
+            leaves = self.left[nodes] < 0
+            for node in nodes[leaves].tolist():
+                found.append(self.order[self.start[node]:self.end[node]])
+            inner = nodes[~leaves]
+            nodes = np.concatenate((self.left[inner], self.right[inner]))
+
+        if not found:
+            return np.array([], dtype=np.int64)
+        indices = np.concatenate(found)
+        offsets = self.points[indices] - point
+        return indices[np.einsum('ij,ij->i', offsets, offsets) <= radius * radius]
+
+    def nearest(self, point, min_index=0):
+        # (number, distance) of the closest point numbered min_index or more, or (None, inf)
+        point = np.asarray(point, dtype=np.float64)
+        best, best_distance = None, float("inf")
+        if not len(self.start):
+            return best, best_distance
+
+        heap = [(self.box_distance(0, point), 0)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if distance >= best_distance:
+                break
+            if self.max_index[node] < min_index:
+                continue
+
+            if self.left[node] < 0:
+                indices = self.order[self.start[node]:self.end[node]]
+                indices = indices[indices >= min_index]
+                if len(indices):
+                    offsets = self.points[indices] - point
+                    distances = np.einsum('ij,ij->i', offsets, offsets)
+                    closest = int(np.argmin(distances))
+                    if distances[closest] < best_distance ** 2:
+                        best, best_distance = int(indices[closest]), float(np.sqrt(distances[closest]))
+            else:
+                for child in (self.left[node], self.right[node]):
+                    if self.max_index[child] >= min_index:
+                        heapq.heappush(heap, (self.box_distance(child, point), child))
+
+        return best, best_distance
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+from bisect import bisect_left
+from time import perf_counter, time
+
+from config import appname
+
+# We need a name of plugin dir, not Metrics.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+# Upper bounds of the histogram buckets, in seconds: 10us to 60s, roughly 3 buckets per decade
+BUCKETS = [b * 10 ** e for e in range(-5, 2) for b in (1, 2.5, 5)] + [60]
+
+
+class Histogram():
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding that fraction of the values
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class Timer():
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, perf_counter() - self.start)
+
+
+class NullTimer():
+    # Handed out while metrics are off, so a timed block costs two empty calls
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+class Metrics():
+    default_interval = 300
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started = time()
+        # "log" for the plugin log, "json" for metrics.json in the plugin folder
+        self.output = None
+        self.path = None
+        self.interval = self.default_interval
+        self.stopped = threading.Event()
+        # Name -> function returning a dict, for modules keeping their own statistics
+        self.sources = {}
+
+    def configure(self, output, path, interval=0):
+        if output not in ("log", "json"):
+            return
+        self.output = output
+        self.path = path
+        self.interval = interval or self.default_interval
+        self.enabled = True
+        threading.Thread(target=self.run, name="SpanshRouter-metrics", daemon=True).start()
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def timer(self, name):
+        return Timer(self, name) if self.enabled else NULL_TIMER
+
+    def add_source(self, name, stats):
+        self.sources[name] = stats
+
+    def snapshot(self):
+        with self.lock:
+            snapshot = {
+                "uptime": time() - self.started,
+                "counters": dict(self.counters),
+                "timers": {name: histogram.summary() for name, histogram in self.histograms.items()},
+            }
+        # Outside the lock, sources may count things themselves
+        for name, stats in self.sources.items():
+            snapshot[name] = stats()
+        return snapshot
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            snapshot = self.snapshot()
+            if self.output == "json":
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, 'w') as metrics_fh:
+                    json.dump(snapshot, metrics_fh, indent=1)
+                os.replace(tmp_path, self.path)
+            else:
+                logger.info(f"SpanshRouter metrics: {json.dumps(snapshot)}")
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+
+    def stop(self):
+        if self.enabled:
+            self.stopped.set()
+            self.write()
+
+
+metrics = Metrics()
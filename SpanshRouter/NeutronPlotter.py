@@ -0,0 +1,255 @@
+import csv
+import heapq
+import io
+import logging
+import math
+import os
+import threading
+from time import monotonic
+
+import numpy as np
+
+from config import appname
+
+from .KDTree import KDTree
+from .Metrics import metrics
+from .PlotJob import PlotJob
+
+# We need a name of plugin dir, not NeutronPlotter.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+# Star types in the catalog, and how much they boost the next jump
+NORMAL = 0
+NEUTRON = 1
+WHITE_DWARF = 2
+BOOSTS = {NORMAL: 1.0, NEUTRON: 4.0, WHITE_DWARF: 1.5}
+
+CATALOG_NAMES = ["neutron_catalog.npz", "neutron_catalog.csv"]
+
+
+class StarCatalog():
+    # Star names, coordinates and types, as numpy arrays.
+    # The CSV has a header with at least name, x, y, z, and neutron and white_dwarf set to 1 or 0
+    def __init__(self, names, coords, types):
+        # Names as UTF-8 bytes, so a million of them fit in a fixed width array
+        self.names = names
+        self.coords = coords
+        self.types = types
+
+    def __len__(self):
+        return len(self.coords)
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".npz"):
+            with np.load(path) as arrays:
+                return cls(arrays["names"], arrays["coords"], arrays["types"])
+
+        names = []
+        coords = []
+        types = []
+        with io.open(path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                names.append(row["name"].encode('utf-8'))
+                coords.append((float(row["x"]), float(row["y"]), float(row["z"])))
+                if row.get("neutron") == "1":
+                    types.append(NEUTRON)
+                elif row.get("white_dwarf") == "1":
+                    types.append(WHITE_DWARF)
+                else:
+                    types.append(NORMAL)
+        return cls(np.array(names, dtype=bytes), np.array(coords, dtype=np.float64).reshape(-1, 3),
+                   np.array(types, dtype=np.uint8))
+
+    def save(self, path):
+        # np.savez appends .npz to names without it
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, names=self.names, coords=self.coords, types=self.types)
+        os.replace(tmp_path, path)
+
+    def find(self, name):
+        # Row of the star, or None
+        key = name.strip().encode('utf-8')
+        rows = np.flatnonzero(self.names == key)
+        if not len(rows):
+            rows = np.flatnonzero(np.char.lower(self.names) == key.lower())
+        return int(rows[0]) if len(rows) else None
+
+    def name(self, row):
+        return self.names[row].decode('utf-8')
+
+
+class NeutronPlotter():
+    # A* over the neutron stars and white dwarfs of the catalog, counting jumps like the
+    # Spansh neutron plotter: a boosted jump from a neutron star reaches 4 times the range,
+    # from a white dwarf 1.5 times, and the rest of each leg is flown with normal jumps.
+    #
+    # Efficiency works as in the GUI: a booster is only worth a detour when going through
+    # it is at most (100 - efficiency)% longer than flying straight to the destination,
+    # and the higher it is, the fewer stars are tried
+    # Normal jumps we are willing to fly after a boost to reach the next booster
+    reach = 4
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        boosters = np.flatnonzero(catalog.types != NORMAL)
+        # Booster rows in the catalog, numbered as the tree numbers its points
+        self.boosters = boosters
+        self.tree = KDTree(catalog.coords[boosters])
+
+    def leg_jumps(self, distance, range_ly, boost):
+        # Jumps from a star with that boost to a star distance away
+        boosted = range_ly * boost
+        if distance <= boosted:
+            return 1
+        return 1 + math.ceil((distance - boosted) / range_ly)
+
+    def plot(self, source, destination, range_ly, efficiency, cancelled=None):
+        # System rows from source to destination and the jumps to each, or None if cancelled
+        coords = self.catalog.coords
+        types = self.catalog.types
+        target = coords[destination]
+        # Generous on purpose, 100% still lets the route through boosters right on the way
+        detour = 1.0 + max(100 - efficiency, 1) / 100
+        max_boost = max(BOOSTS.values())
+
+        # No jump covers more than a neutron boosted one, so that never overestimates the jumps left.
+        # Like on Spansh, efficiency also trades the fewest jumps for plot time: the estimate is
+        # inflated by up to 2 times, the route then costs at most that many times the fewest jumps
+        per_jump = range_ly * max_boost / (1.0 + efficiency / 100)
+
+        jumps = {source: 0}
+        previous = {source: None}
+        # Ties on the estimated total go to the star closest to the destination,
+        # there are many of them with whole jumps as costs
+        straight = float(np.linalg.norm(target - coords[source]))
+        heap = [(straight / per_jump, straight, 0, source)]
+        done = set()
+        while heap:
+            if cancelled is not None and cancelled():
+                return None
+
+            estimate, straight, cost, row = heapq.heappop(heap)
+            if row in done:
+                continue
+            done.add(row)
+            if row == destination:
+                break
+
+            position = coords[row]
+            boost = BOOSTS[int(types[row])]
+
+            # Straight to the destination, and through every booster in reach
+            candidates = [(destination, self.leg_jumps(straight, range_ly, boost), 0.0)]
+            found = self.boosters[self.tree.query_radius(position, range_ly * (boost + self.reach))]
+            distances = np.linalg.norm(coords[found] - position, axis=1)
+            onwards = np.linalg.norm(coords[found] - target, axis=1)
+            worth = distances + onwards <= straight * detour
+            found = found[worth]
+            distances = distances[worth]
+            onwards = onwards[worth]
+            # Same as leg_jumps, for all of them at once
+            legs = 1 + np.ceil(np.maximum(distances - range_ly * boost, 0) / range_ly).astype(int)
+            candidates.extend(zip(found.tolist(), legs.tolist(), onwards.tolist()))
+
+            for candidate, leg, onward in candidates:
+                if candidate == row or candidate in done:
+                    continue
+                total = cost + leg
+                if total < jumps.get(candidate, total + 1):
+                    jumps[candidate] = total
+                    previous[candidate] = row
+                    heapq.heappush(heap, (total + onward / per_jump, onward, total, candidate))
+
+        rows = []
+        row = destination
+        while row is not None:
+            rows.append(row)
+            row = previous[row]
+        rows.reverse()
+        return [(row, jumps[row] - (jumps[rows[i - 1]] if i else 0)) for i, row in enumerate(rows)]
+
+    def system_jumps(self, rows):
+        # The plotted rows in the shape the Spansh API returns
+        coords = self.catalog.coords
+        destination = coords[rows[-1][0]]
+        result = []
+        previous = None
+        for row, jumps in rows:
+            position = coords[row]
+            result.append({
+                "system": self.catalog.name(row),
+                "jumps": jumps,
+                "distance_jumped": float(np.linalg.norm(position - previous)) if previous is not None else 0.0,
+                "distance_left": float(np.linalg.norm(destination - position)),
+                "neutron_star": bool(self.catalog.types[row] == NEUTRON),
+                "x": float(position[0]),
+                "y": float(position[1]),
+                "z": float(position[2]),
+            })
+            previous = position
+        return result
+
+
+def find_catalog(folder):
+    for name in CATALOG_NAMES:
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+class LocalPlotter():
+    # Loads the catalog and builds the tree on first use, from the plot worker thread
+    def __init__(self, folder):
+        self.folder = folder
+        self.plotter = None
+        self.lock = threading.Lock()
+
+    def available(self):
+        return find_catalog(self.folder) is not None
+
+    def get(self):
+        with self.lock:
+            if self.plotter is None:
+                path = find_catalog(self.folder)
+                start = monotonic()
+                catalog = StarCatalog.load(path)
+                if path.endswith(".csv"):
+                    # Much faster to load next time
+                    catalog.save(os.path.join(self.folder, CATALOG_NAMES[0]))
+                self.plotter = NeutronPlotter(catalog)
+                logger.info(f"Loaded {len(catalog)} stars from {path} in {monotonic() - start:.1f}s")
+            return self.plotter
+
+
+class LocalPlotJob(PlotJob):
+    # Same interface as a Spansh PlotJob, so the engine and callbacks don't tell them apart
+    def __init__(self, params, callback, local_plotter):
+        PlotJob.__init__(self, params, callback)
+        self.local_plotter = local_plotter
+
+    def run(self):
+        start = monotonic()
+        plotter = self.local_plotter.get()
+        self.timings["load"] = monotonic() - start
+
+        source = plotter.catalog.find(self.params["from"])
+        destination = plotter.catalog.find(self.params["to"])
+        if source is None:
+            self.error = f"Could not find starting system {self.params['from']} in the local catalog"
+            return
+        if destination is None:
+            self.error = f"Could not find finishing system {self.params['to']} in the local catalog"
+            return
+
+        rows = plotter.plot(source, destination, float(self.params["range"]), int(self.params["efficiency"]),
+                            self.is_cancelled)
+        if rows is None:
+            return
+        self.route = plotter.system_jumps(rows)
+        self.timings["total"] = monotonic() - start
+        logger.info("Route plotted locally in {total:.2f}s (catalog {load:.2f}s)".format(**self.timings))
+        for name, value in self.timings.items():
+            metrics.observe(f"plot.local.{name}", value)
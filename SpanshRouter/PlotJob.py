@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+from config import appname
+
+from .HttpClient import http_client
+from .Metrics import metrics
+
+# We need a name of plugin dir, not PlotJob.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class PlotJob():
+    job_url = "https://spansh.co.uk/api/route?"
+    results_url = "https://spansh.co.uk/api/results/"
+
+    # Adaptive backoff between two polls of the results endpoint, in seconds
+    first_poll_delay = 0.5
+    max_poll_delay = 5
+    poll_backoff = 1.5
+    # Give up on the job after that many seconds
+    max_wait = 120
+
+    def __init__(self, params, callback, cache=None):
+        self.params = params
+        self.callback = callback
+        # RouteCache the plotted route is stored in, from the worker thread
+        self.cache = cache
+        self.cancelled = threading.Event()
+        self.route = None
+        self.error = None
+        self.status_code = None
+        self.timed_out = False
+        self.timings = {}
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def run(self):
+        start = monotonic()
+        results = http_client.post("route", self.job_url, params=self.params)
+        self.timings["submit"] = monotonic() - start
+
+        if results.status_code != 202:
+            logger.warning(f"Failed to query plotted route from Spansh: code {str(results.status_code)}; text: {results.text}")
+            self.set_failure(results)
+            return
+
+        job = json.loads(results.content)["job"]
+        url = self.results_url + job
+        delay = self.first_poll_delay
+        queued_until = None
+        deadline = monotonic() + self.max_wait
+
+        while not self.is_cancelled():
+            poll_start = monotonic()
+            route_response = http_client.get("results", url)
+            poll_end = monotonic()
+
+            if route_response.status_code != 202:
+                if queued_until is None:
+                    queued_until = poll_start
+                self.timings["queue"] = queued_until - start - self.timings["submit"]
+                self.timings["compute"] = poll_start - queued_until
+                self.timings["download"] = poll_end - poll_start
+                break
+
+            # Spansh tells us whether the job is still waiting for a worker
+            if queued_until is None and json.loads(route_response.content).get("status") != "queued":
+                queued_until = poll_start
+
+            if poll_end + delay > deadline:
+                self.timed_out = True
+                logger.warning("Query to Spansh timed out")
+                return
+
+            self.cancelled.wait(delay)
+            delay = min(delay * self.poll_backoff, self.max_poll_delay)
+
+        if self.is_cancelled():
+            return
+
+        if route_response.status_code == 200:
+            self.route = json.loads(route_response.content)["result"]["system_jumps"]
+            self.timings["total"] = monotonic() - start
+            logger.info("Spansh route plotted in {total:.2f}s (submit {submit:.2f}s, queue {queue:.2f}s, "
+                        "compute {compute:.2f}s, download {download:.2f}s)".format(**self.timings))
+            for name, value in self.timings.items():
+                metrics.observe(f"plot.{name}", value)
+            if self.cache is not None:
+                self.cache.put(self.params, self.route)
+        else:
+            metrics.count("plot.failures")
+            logger.warning(f"Failed to query plotted route from Spansh, code: {str(route_response.status_code)}; text: {route_response.text}")
+            self.set_failure(route_response)
+
+    def set_failure(self, response):
+        self.status_code = response.status_code
+        try:
+            failure = json.loads(response.content)
+        except ValueError:
+            failure = {}
+
+        if response.status_code == 400 and "error" in failure:
+            self.error = failure["error"]
+
+
+class PlotJobEngine():
+    def __init__(self, widget, max_workers=2):
+        self.widget = widget
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="SpanshRouter-plot")
+        self.finished = queue.Queue()
+        self.jobs = []
+        self.polling = False
+
+    def submit(self, job):
+        self.jobs.append(job)
+        self.executor.submit(self.run_job, job)
+        if not self.polling:
+            self.polling = True
+            self.widget.after(100, self.poll)
+        return job
+
+    def run_job(self, job):
+        try:
+            # Cancelled while waiting for a worker, Spansh never hears of it
+            if not job.is_cancelled():
+                job.run()
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+        finally:
+            self.finished.put(job)
+
+    def poll(self):
+        # Runs on the Tk thread, so callbacks are free to touch the GUI
+        try:
+            while 1:
+                job = self.finished.get_nowait()
+                self.jobs.remove(job)
+                if not job.is_cancelled():
+                    job.callback(job)
+        except queue.Empty:
+            pass
+
+        if self.jobs:
+            self.widget.after(100, self.poll)
+        else:
+            self.polling = False
+
+    def cancel_all(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def shutdown(self):
+        self.cancel_all()
+        # Jobs still queued are dropped rather than run on the way out
+        self.executor.shutdown(wait=False, cancel_futures=True)
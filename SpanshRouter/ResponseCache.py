@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import sys
+import traceback
+
+from config import appname
+
+from .HttpClient import http_client
+
+# We need a name of plugin dir, not ResponseCache.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class ResponseCache():
+    # Keeps the last body of each URL with its validators, so asking again costs
+    # a 304 with no body (which GitHub doesn't count against the API rate limit)
+    def __init__(self, path):
+        self.path = path
+        self.entries = None
+        self.dirty = False
+
+    def get(self, endpoint, url):
+        # The current body of url, or None if it can't be fetched
+        self.load()
+        entry = self.entries.get(url)
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = http_client.get(endpoint, url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            return entry["body"]
+        if response.status_code != 200:
+            logger.warning(f"Could not fetch {url}, code: {response.status_code}")
+            return None
+
+        self.entries[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body": response.text,
+        }
+        self.dirty = True
+        return response.text
+
+    def load(self):
+        if self.entries is not None:
+            return
+        self.entries = {}
+        try:
+            with open(self.path, 'r') as cache_fh:
+                self.entries = json.load(cache_fh)
+        except IOError:
+            pass
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as cache_fh:
+                json.dump(self.entries, cache_fh)
+            os.replace(tmp_path, self.path)
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
@@ -0,0 +1,189 @@
+import sys
+from array import array
+from bisect import bisect_left
+
+
+class Waypoint():
+    # One stop, as parsed from a file or a plotter. A Route keeps its fields in
+    # columns and hands out a new Waypoint each time one is looked up
+    __slots__ = ("system", "jumps", "body_names", "body_subtypes", "restock", "refuel",
+                 "distance_remaining", "fuel_used", "scan_value", "bodies_text", "coords")
+
+    def __init__(self, system, jumps=0, body_names=None, body_subtypes=None, restock=False, refuel=False,
+                 distance_remaining=None, fuel_used=0.0, scan_value=0, coords=None, bodies_text=None):
+        # Routes repeat sector names a lot, and the journal hands us the same strings again
+        self.system = sys.intern(system)
+        self.jumps = jumps
+        self.body_names = body_names
+        self.body_subtypes = body_subtypes
+        self.restock = restock
+        self.refuel = refuel
+        # Light years from this system to the end of the route
+        self.distance_remaining = distance_remaining
+        self.fuel_used = fuel_used
+        self.scan_value = scan_value
+        # Bodies to scan, classified once when the route is loaded
+        self.bodies_text = bodies_text
+        # (x, y, z) galactic coordinates, when the plotter or the file gave them
+        self.coords = coords
+
+
+RESTOCK = 1
+REFUEL = 2
+# Stands for a missing distance or coordinate in the float columns
+MISSING = float("nan")
+
+
+class Route():
+    def __init__(self, kind="basic"):
+        # One of "basic", "riches", "fleetcarrier" or "galaxy"
+        self.kind = kind
+        self.systems = []
+        # Hash of the lower-cased system name -> position of that system in the route,
+        # or a list of positions for the few systems a route goes through twice.
+        # A hash takes about half the memory of a second copy of the name
+        self.index = {}
+        # Prefix sums: jumps_sum[i] holds the jumps of the first i waypoints, so
+        # any remaining total is a subtraction, whatever the offset, and a single
+        # waypoint's value is jumps_sum[i + 1] - jumps_sum[i]
+        self.jumps_sum = array('q', [0])
+        self.fuel_sum = array('d', [0.0])
+        self.value_sum = array('q', [0])
+        self.distances = array('d')
+        # RESTOCK and REFUEL bits
+        self.flags = bytearray()
+        # Side columns, only filled by the routes that have them: position -> (names, subtypes, text)
+        # of the bodies to scan, and x, y, z of every waypoint once one has coordinates
+        self.bodies = {}
+        self.coords = None
+        self.has_distance = False
+        self.has_fuel = False
+        self.has_value = False
+        # Spatial index over the waypoints with coordinates, built on first use
+        self.tree = None
+        self.tree_positions = None
+
+    def __len__(self):
+        return len(self.systems)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self.systems)
+        if not 0 <= position < len(self.systems):
+            raise IndexError(position)
+
+        distance = self.distances[position]
+        flags = self.flags[position]
+        body_names, body_subtypes, bodies_text = self.bodies.get(position, (None, None, None))
+        return Waypoint(self.systems[position], self.jumps_sum[position + 1] - self.jumps_sum[position],
+                        body_names, body_subtypes, bool(flags & RESTOCK), bool(flags & REFUEL),
+                        distance if distance == distance else None,
+                        self.fuel_sum[position + 1] - self.fuel_sum[position],
+                        self.value_sum[position + 1] - self.value_sum[position],
+                        self.coords_at(position), bodies_text)
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self.systems)))
+
+    def coords_at(self, position):
+        if self.coords is None or self.coords[3 * position] != self.coords[3 * position]:
+            return None
+        return tuple(self.coords[3 * position:3 * position + 3])
+
+    def append(self, waypoint):
+        key = hash(waypoint.system.lower())
+        position = len(self.systems)
+        positions = self.index.get(key)
+        if positions is None:
+            self.index[key] = position
+        elif isinstance(positions, list):
+            positions.append(position)
+        else:
+            self.index[key] = [positions, position]
+        self.systems.append(waypoint.system)
+
+        self.jumps_sum.append(self.jumps_sum[-1] + waypoint.jumps)
+        self.fuel_sum.append(self.fuel_sum[-1] + waypoint.fuel_used)
+        self.value_sum.append(self.value_sum[-1] + waypoint.scan_value)
+        self.distances.append(MISSING if waypoint.distance_remaining is None else waypoint.distance_remaining)
+        self.flags.append((RESTOCK if waypoint.restock else 0) | (REFUEL if waypoint.refuel else 0))
+        if waypoint.body_names is not None:
+            self.bodies[position] = (waypoint.body_names, waypoint.body_subtypes, waypoint.bodies_text)
+        if waypoint.coords is not None and self.coords is None:
+            self.coords = array('d', [MISSING]) * (3 * position)
+        if self.coords is not None:
+            self.coords.extend(waypoint.coords if waypoint.coords is not None else (MISSING, MISSING, MISSING))
+
+        self.has_distance = self.has_distance or waypoint.distance_remaining is not None
+        self.has_fuel = self.has_fuel or waypoint.fuel_used > 0
+        self.has_value = self.has_value or waypoint.scan_value > 0
+        self.tree = None
+
+    def find(self, system, start=0):
+        # First position of the system at or after start
+        key = system.lower()
+        positions = self.index.get(hash(key))
+        if positions is None:
+            return None
+        if not isinstance(positions, list):
+            positions = [positions]
+        # Names sharing a hash are told apart here
+        for position in positions[bisect_left(positions, start):]:
+            if self.systems[position].lower() == key:
+                return position
+        return None
+
+    def bodies_text(self, position):
+        return self.bodies.get(position, (None, None, None))[2]
+
+    def build_tree(self):
+        # False when there is nothing to index or numpy is missing
+        if self.coords is None:
+            self.tree = False
+            return self.tree
+        try:
+            import numpy as np
+            from .KDTree import KDTree
+        except ImportError:
+            self.tree = False
+            return self.tree
+
+        points = np.array(self.coords, dtype=np.float64).reshape(-1, 3)
+        known = ~np.isnan(points[:, 0])
+        self.tree_positions = np.flatnonzero(known)
+        # Tree point numbers follow the route order, so "at or after start" is a bound on them
+        self.tree = KDTree(points[known])
+        return self.tree
+
+    def nearest(self, coords, start=0):
+        # (position, distance) of the waypoint at or after start closest to coords, or None
+        tree = self.build_tree() if self.tree is None else self.tree
+        if not tree:
+            return None
+        number, distance = tree.nearest(coords, int(self.tree_positions.searchsorted(start)))
+        if number is None:
+            return None
+        return int(self.tree_positions[number]), distance
+
+    # Totals from the next stop at offset to the end of the route
+
+    def jumps_left(self, offset):
+        offset = min(max(offset, 0), len(self.systems))
+        return self.jumps_sum[-1] - self.jumps_sum[offset]
+
+    def fuel_left(self, offset):
+        offset = min(max(offset, 0), len(self.systems))
+        return self.fuel_sum[-1] - self.fuel_sum[offset]
+
+    def value_left(self, offset):
+        # Bodies are scanned in the system we're in, the one before the next stop
+        offset = min(max(offset - 1, 0), len(self.systems))
+        return self.value_sum[-1] - self.value_sum[offset]
+
+    def distance_left(self, offset):
+        if not self.systems:
+            return None
+        if offset >= len(self.systems):
+            return 0.0
+        distance = self.distances[max(offset - 1, 0)]
+        return distance if distance == distance else None
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+from time import time
+
+from config import appname
+
+# We need a name of plugin dir, not RouteCache.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+def normalize_params(params):
+    # Spansh doesn't care about case or spacing in system names, nor about a range
+    # typed as 50 or 50.0, so neither should the cache
+    return {
+        "from": " ".join(params["from"].split()).casefold(),
+        "to": " ".join(params["to"].split()).casefold(),
+        "range": round(float(params["range"]), 2),
+        "efficiency": int(params["efficiency"]),
+    }
+
+
+def params_key(params):
+    return hashlib.sha256(json.dumps(normalize_params(params), sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class RouteCache():
+    # Plotted routes as returned by Spansh, one file per set of plot parameters.
+    # Age is counted from the plot time stored in the file, the file modification
+    # time is the last use and only orders eviction
+    def __init__(self, folder, max_entries=50, max_bytes=20 * 1024 * 1024, max_age=7 * 24 * 3600):
+        self.folder = folder
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # Plot jobs store their routes from the worker threads
+        self.lock = threading.Lock()
+
+    def path(self, params):
+        return os.path.join(self.folder, params_key(params) + ".json")
+
+    def get(self, params):
+        path = self.path(params)
+        try:
+            with open(path, 'r') as route_fh:
+                entry = json.load(route_fh)
+            if time() - entry.get("created", 0) > self.max_age:
+                # Too old to trust, however often it was used
+                self.remove(path)
+                return None
+            os.utime(path)
+            return entry["route"]
+        except OSError:
+            return None
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            self.remove(path)
+            return None
+
+    def put(self, params, route):
+        path = self.path(params)
+        with self.lock:
+            try:
+                os.makedirs(self.folder, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, 'w') as route_fh:
+                    json.dump({"params": normalize_params(params), "created": time(), "route": route}, route_fh,
+                              separators=(',', ':'))
+                os.replace(tmp_path, path)
+                self.evict()
+            except:
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+                logger.warning(''.join('!! ' + line for line in lines))
+
+    def evict(self):
+        now = time()
+        entries = []
+        for entry in os.scandir(self.folder):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            # Unused for that long means created even earlier, no need to open the file
+            if now - stat.st_mtime > self.max_age:
+                self.remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # Least recently used first
+        entries.sort()
+        total = sum(size for mtime, size, path in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            mtime, size, path = entries.pop(0)
+            self.remove(path)
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,202 @@
+import csv
+import re
+from itertools import takewhile
+from operator import itemgetter
+
+from .Route import Waypoint
+
+SYSTEM = "System Name"
+JUMPS = "Jumps"
+BODY_NAME = "Body Name"
+BODY_SUBTYPE = "Body Subtype"
+RESTOCK_TRITIUM = "Restock Tritium"
+REFUEL = "Refuel"
+SCAN_VALUE = "Estimated Scan Value"
+MAPPING_VALUE = "Estimated Mapping Value"
+DISTANCE_REMAINING = "Distance Remaining"
+FUEL_USED = "Fuel Used"
+# Our saved riches routes hold the scan and mapping value of each system in a single column
+SYSTEM_VALUE = "Scan Value"
+# Optional in every format, the waypoint coordinates
+COORDINATES = ("X", "Y", "Z")
+
+
+class RouteFormat():
+    def __init__(self, name, kind, required, optional, parse):
+        self.name = name
+        # One of "basic", "riches", "fleetcarrier" or "galaxy"
+        self.kind = kind
+        self.required = frozenset(required)
+        self.optional = tuple(optional)
+        self.parse = parse
+
+    def matches(self, fieldnames):
+        return self.required.issubset(fieldnames)
+
+    def columns(self, fieldnames):
+        # Resolve every column to its position once, rows are then read by index
+        positions = {}
+        for i, name in enumerate(fieldnames):
+            positions.setdefault(name, i)
+
+        columns = {}
+        for name in self.required:
+            columns[name] = itemgetter(positions[name])
+        for name in self.optional + COORDINATES:
+            columns[name] = itemgetter(positions[name]) if name in positions else lambda row: ""
+        return columns
+
+    def read(self, reader, fieldnames):
+        width = len(fieldnames)
+        # Older versions saved riches and fleet carrier routes twice, the second copy
+        # under a "System Name,Jumps" header: the route ends at the first header row
+        rows = takewhile(lambda row: row[0] != fieldnames[0], (row for row in reader if row))
+        rows = (row if len(row) >= width else row + [""] * (width - len(row)) for row in rows)
+        return self.parse(rows, self.columns(fieldnames))
+
+
+# Most specific first, so a file matching several formats picks the one requiring the most columns
+formats = []
+
+
+def route_format(name, kind, required, optional=()):
+    def register(parse):
+        formats.append(RouteFormat(name, kind, required, optional, parse))
+        formats.sort(key=lambda route_format: -len(route_format.required))
+        return parse
+    return register
+
+
+def detect_format(fieldnames):
+    fieldnames = set(fieldnames)
+    for route_format in formats:
+        if route_format.matches(fieldnames):
+            return route_format
+    return None
+
+
+def read_route(csvfile):
+    # Returns the detected format and a generator over its rows, or (None, None)
+    reader = csv.reader(csvfile)
+    fieldnames = next(reader, None)
+    route_format = detect_format(fieldnames) if fieldnames else None
+    if route_format is None:
+        return None, None
+    return route_format, route_format.read(reader, fieldnames)
+
+
+# repr() of a list of plain strings, as older versions saved body lists
+STRING_ITEM = r"'[^'\\]*'" + r'|"[^"\\]*"'
+STRING_LIST = re.compile(rf"\[(?:\s*(?:{STRING_ITEM})\s*(?:,\s*(?:{STRING_ITEM})\s*)*)?\]")
+STRING_ITEMS = re.compile(STRING_ITEM)
+
+
+def decode_list(text):
+    # Two regex passes instead of the Python parser, which only handles the rare names with escapes
+    if STRING_LIST.fullmatch(text):
+        return tuple(item[1:-1] for item in STRING_ITEMS.findall(text))
+    import ast
+    return tuple(ast.literal_eval(text))
+
+
+def to_int(value):
+    return int(value) if value else 0
+
+
+def to_float(value, default=0.0):
+    return float(value) if value else default
+
+
+def is_yes(value):
+    return value.lower() == "yes"
+
+
+def coordinates(col):
+    # Reads the X, Y and Z columns as a tuple, None where they are empty
+    x, y, z = (col[name] for name in COORDINATES)
+
+    def read(row):
+        value = x(row)
+        return (float(value), float(y(row)), float(z(row))) if value else None
+    return read
+
+
+# Neutron plotter exports, and our own saved routes
+@route_format("Neutron", "basic", [SYSTEM], [JUMPS, DISTANCE_REMAINING, FUEL_USED])
+def parse_basic(rows, col):
+    system, jumps, distance, fuel = col[SYSTEM], col[JUMPS], col[DISTANCE_REMAINING], col[FUEL_USED]
+    coords = coordinates(col)
+    for row in rows:
+        yield Waypoint(system(row), to_int(jumps(row)),
+                       distance_remaining=to_float(distance(row), None), fuel_used=to_float(fuel(row)),
+                       coords=coords(row))
+
+
+@route_format("Road to riches (saved)", "riches", [SYSTEM, JUMPS, BODY_NAME, BODY_SUBTYPE], [SYSTEM_VALUE])
+def parse_riches_saved(rows, col):
+    system, jumps, bodyname, bodysubtype, value = col[SYSTEM], col[JUMPS], col[BODY_NAME], col[BODY_SUBTYPE], col[SYSTEM_VALUE]
+    coords = coordinates(col)
+    for row in rows:
+        yield Waypoint(system(row), to_int(jumps(row)), decode_list(bodyname(row)), decode_list(bodysubtype(row)),
+                       scan_value=to_int(value(row)), coords=coords(row))
+
+
+@route_format("Road to riches", "riches", [SYSTEM, JUMPS, BODY_NAME, BODY_SUBTYPE, SCAN_VALUE], [MAPPING_VALUE])
+def parse_riches(rows, col):
+    system, jumps, bodyname, bodysubtype = col[SYSTEM], col[JUMPS], col[BODY_NAME], col[BODY_SUBTYPE]
+    scan, mapping = col[SCAN_VALUE], col[MAPPING_VALUE]
+    coords = coordinates(col)
+    # A system spans several rows, one per body, so it is only complete when the next one starts
+    current = None
+    for row in rows:
+        name = system(row)
+        value = int(to_float(scan(row)) + to_float(mapping(row)))
+        if current is not None and name == current[0]:
+            current[2].append(bodyname(row))
+            current[3].append(bodysubtype(row))
+            current[4] += value
+            continue
+
+        if current is not None:
+            yield Waypoint(current[0], current[1], tuple(current[2]), tuple(current[3]), scan_value=current[4],
+                           coords=current[5])
+        current = [name, to_int(jumps(row)), [bodyname(row)], [bodysubtype(row)], value, coords(row)]
+
+    if current is not None:
+        yield Waypoint(current[0], current[1], tuple(current[2]), tuple(current[3]), scan_value=current[4],
+                       coords=current[5])
+
+
+@route_format("Fleet carrier (saved)", "fleetcarrier", [SYSTEM, JUMPS, RESTOCK_TRITIUM], [DISTANCE_REMAINING, FUEL_USED])
+def parse_fleetcarrier_saved(rows, col):
+    system, jumps, restock = col[SYSTEM], col[JUMPS], col[RESTOCK_TRITIUM]
+    distance, fuel = col[DISTANCE_REMAINING], col[FUEL_USED]
+    coords = coordinates(col)
+    for row in rows:
+        yield Waypoint(system(row), to_int(jumps(row)), restock=is_yes(restock(row)),
+                       distance_remaining=to_float(distance(row), None), fuel_used=to_float(fuel(row)),
+                       coords=coords(row))
+
+
+@route_format("Fleet carrier", "fleetcarrier", [SYSTEM, RESTOCK_TRITIUM], [DISTANCE_REMAINING, FUEL_USED])
+def parse_fleetcarrier(rows, col):
+    system, restock = col[SYSTEM], col[RESTOCK_TRITIUM]
+    distance, fuel = col[DISTANCE_REMAINING], col[FUEL_USED]
+    coords = coordinates(col)
+    for row in rows:
+        # Jumps is faked as every row is 1 jump
+        yield Waypoint(system(row), 1, restock=is_yes(restock(row)),
+                       distance_remaining=to_float(distance(row), None), fuel_used=to_float(fuel(row)),
+                       coords=coords(row))
+
+
+@route_format("Galaxy", "galaxy", [SYSTEM, REFUEL], [DISTANCE_REMAINING, FUEL_USED])
+def parse_galaxy(rows, col):
+    system, refuel = col[SYSTEM], col[REFUEL]
+    distance, fuel = col[DISTANCE_REMAINING], col[FUEL_USED]
+    coords = coordinates(col)
+    for row in rows:
+        # Every waypoint of a galaxy route is a single jump
+        yield Waypoint(system(row), 1, refuel=is_yes(refuel(row)),
+                       distance_remaining=to_float(distance(row), None), fuel_used=to_float(fuel(row)),
+                       coords=coords(row))
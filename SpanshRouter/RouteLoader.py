@@ -0,0 +1,57 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import traceback
+
+from config import appname
+
+from .Metrics import metrics
+
+# We need a name of plugin dir, not RouteLoader.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+class RouteLoader():
+    # Reads the saved route off the Tk thread. Results are queued in order:
+    # ("waypoint", kind, offset, next waypoint or None), then ("route", route)
+    # or ("failed", None) if anything went wrong
+    def __init__(self, store, prepare=None, migrate=None):
+        self.store = store
+        self.prepare = prepare
+        # Called first when the store is still empty, to bring in routes saved by older versions
+        self.migrate = migrate
+        self.results = queue.Queue()
+        self.cancelled = False
+
+    def start(self):
+        threading.Thread(target=self.run, name="SpanshRouter-restore", daemon=True).start()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            if self.migrate is not None and not self.store.has_route():
+                self.migrate()
+
+            kind = self.store.load_kind()
+            offset = self.store.load_offset()
+            # A single row, so the next stop shows up long before the rest of the route
+            self.results.put(("waypoint", kind, offset, self.store.load_waypoint(offset)))
+            if self.cancelled:
+                return
+            with metrics.timer("route.restore"):
+                route = self.store.load_route(self.prepare, lambda: self.cancelled)
+                if route is None:
+                    return
+                # Built here rather than on the first jump, which runs on the Tk thread
+                route.build_tree()
+            self.results.put(("route", route))
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            self.results.put(("failed", None))
@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+
+from config import appname
+
+from .Route import Route, Waypoint
+
+# We need a name of plugin dir, not RouteStore.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+# Body names and subtypes are stored as one column each, split on a separator no name can contain
+BODY_SEPARATOR = "\x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS waypoints (
+    position INTEGER PRIMARY KEY,
+    system TEXT NOT NULL,
+    jumps INTEGER NOT NULL,
+    body_names TEXT,
+    body_subtypes TEXT,
+    restock INTEGER NOT NULL,
+    refuel INTEGER NOT NULL,
+    distance_remaining REAL,
+    fuel_used REAL NOT NULL,
+    scan_value INTEGER NOT NULL
+);
+"""
+
+# Applied in order to bring older stores up to date, PRAGMA user_version counts those already done
+MIGRATIONS = [
+    # Waypoint coordinates, to rejoin the route from anywhere
+    """
+    ALTER TABLE waypoints ADD COLUMN x REAL;
+    ALTER TABLE waypoints ADD COLUMN y REAL;
+    ALTER TABLE waypoints ADD COLUMN z REAL;
+    """,
+]
+
+COLUMNS = "position, system, jumps, body_names, body_subtypes, restock, refuel, distance_remaining, fuel_used, scan_value, x, y, z"
+NO_COORDS = (None, None, None)
+# Waypoints read per query when loading a route
+LOAD_BATCH = 5000
+
+
+def encode_bodies(bodies):
+    return BODY_SEPARATOR.join(bodies) if bodies is not None else None
+
+
+def decode_bodies(bodies):
+    return tuple(bodies.split(BODY_SEPARATOR)) if bodies is not None else None
+
+
+def to_waypoint(row):
+    return Waypoint(row[1], row[2], decode_bodies(row[3]), decode_bodies(row[4]), bool(row[5]), bool(row[6]),
+                    row[7], row[8], row[9], (row[10], row[11], row[12]) if row[10] is not None else None)
+
+
+class RouteStore():
+    def __init__(self, path):
+        self.path = path
+        self.connection = None
+        # The connection is shared with the background route loader
+        self.lock = threading.RLock()
+
+    def connect(self):
+        if self.connection is None:
+            # First called from the route loader thread, which keeps the import off EDMC's startup
+            import sqlite3
+            # Autocommit mode, every write below runs in its own explicit transaction
+            self.connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            # Each commit is synced to disk, so a crash never loses or corrupts a saved route
+            self.connection.execute("PRAGMA synchronous=FULL")
+            self.connection.executescript(SCHEMA)
+            self.migrate()
+        return self.connection
+
+    def migrate(self):
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], version + 1):
+            self.connection.executescript(f"BEGIN IMMEDIATE; {script} PRAGMA user_version = {number}; COMMIT;")
+            logger.info(f"Upgraded {self.path} to version {number}")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def has_route(self):
+        with self.lock:
+            return self.connect().execute("SELECT 1 FROM waypoints LIMIT 1").fetchone() is not None
+
+    def save_route(self, route, offset):
+        with self.lock:
+            connection = self.connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute("DELETE FROM waypoints")
+                connection.executemany(
+                    f"INSERT INTO waypoints ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((position, waypoint.system, waypoint.jumps, encode_bodies(waypoint.body_names),
+                      encode_bodies(waypoint.body_subtypes), waypoint.restock, waypoint.refuel,
+                      waypoint.distance_remaining, waypoint.fuel_used, waypoint.scan_value,
+                      *(waypoint.coords or NO_COORDS))
+                     for position, waypoint in enumerate(route)))
+                connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                                       [("kind", route.kind), ("offset", offset)])
+                connection.execute("COMMIT")
+            except:
+                connection.execute("ROLLBACK")
+                raise
+
+    def save_offset(self, offset):
+        # A single row update, this is all a waypoint advance costs
+        with self.lock:
+            self.connect().execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('offset', ?)", (offset,))
+
+    def load_offset(self):
+        with self.lock:
+            row = self.connect().execute("SELECT value FROM meta WHERE key = 'offset'").fetchone()
+            return int(row[0]) if row is not None else 0
+
+    def load_kind(self):
+        with self.lock:
+            row = self.connect().execute("SELECT value FROM meta WHERE key = 'kind'").fetchone()
+            return row[0] if row is not None else "basic"
+
+    def load_waypoint(self, position):
+        with self.lock:
+            row = self.connect().execute(f"SELECT {COLUMNS} FROM waypoints WHERE position = ?", (position,)).fetchone()
+            return to_waypoint(row) if row is not None else None
+
+    def load_route(self, prepare=None, cancelled=None):
+        # Read in batches, the lock is let go in between so clearing the route doesn't wait
+        # for a big one to load. None if cancelled() turned true on the way
+        route = Route(self.load_kind())
+        position = -1
+        while 1:
+            if cancelled is not None and cancelled():
+                return None
+
+            with self.lock:
+                rows = self.connect().execute(
+                    f"SELECT {COLUMNS} FROM waypoints WHERE position > ? ORDER BY position LIMIT ?",
+                    (position, LOAD_BATCH)).fetchall()
+            for row in rows:
+                waypoint = to_waypoint(row)
+                if prepare is not None:
+                    prepare(waypoint)
+                route.append(waypoint)
+            if len(rows) < LOAD_BATCH:
+                return route
+            position = rows[-1][0]
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM waypoints")
+            connection.execute("DELETE FROM meta")
+            connection.execute("COMMIT")
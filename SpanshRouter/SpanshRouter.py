@@ -1,25 +1,33 @@
-import ast
 import csv
 import io
-import json
 import logging
 import os
+import queue
 import re
-import subprocess
 import sys
+import threading
 import tkinter as tk
-import tkinter.filedialog as filedialog
-import tkinter.messagebox as confirmDialog
 import traceback
-import webbrowser
-from time import sleep
+from itertools import islice
 from tkinter import *
 
-import requests
-from config import appname
+from config import appname, config
 from monitor import monitor
 
 from . import AutoCompleter, PlaceHolder
+from .BodyClassifier import BodyClassifier
+from .Clipboard import create_clipboard
+from .Metrics import metrics
+from .PlotJob import PlotJob, PlotJobEngine
+from .ResponseCache import ResponseCache
+from .Route import Route, Waypoint
+from .RouteCache import RouteCache
+from .RouteFormats import read_route
+from .RouteLoader import RouteLoader
+from .RouteStore import RouteStore
+from .SystemsCache import SystemsCache
+from .SystemsIndex import SystemsIndex
+from .ViewState import ViewState
 from .updater import SpanshUpdater
 
 # We need a name of plugin dir, not SpanshRouter.py dir
@@ -27,6 +35,14 @@ plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
 logger = logging.getLogger(f'{appname}.{plugin_name}')
 
 
+def parse_values(text, cast):
+    # "40, 60,80" -> [40, 60, 80], raises ValueError on anything else
+    values = [cast(value) for value in text.split(",") if value.strip()]
+    if not values:
+        raise ValueError(text)
+    return values
+
+
 class SpanshRouter():
     def __init__(self, plugin_dir):
         version_file = os.path.join(plugin_dir, "version.json")
@@ -34,11 +50,11 @@ class SpanshRouter():
             self.plugin_version = version_fd.read()
 
         self.update_available = False
-        self.roadtoriches = False
-        self.fleetcarrier = False
-        self.galaxy = False
+        # Conditional GETs of the latest version and changelog, answered with a 304 most of the time
+        self.update_cache = ResponseCache(os.path.join(plugin_dir, 'update_cache.json'))
+        self.update_results = queue.Queue()
         self.next_stop = "No route planned"
-        self.route = []
+        self.route = Route()
         self.next_wp_label = "Next waypoint: "
         self.jumpcountlbl_txt = "Estimated jumps left: "
         self.bodieslbl_txt = "Bodies to scan at: "
@@ -50,43 +66,95 @@ class SpanshRouter():
         self.save_route_path = os.path.join(plugin_dir, 'route.csv')
         self.export_route_path = os.path.join(plugin_dir, 'Export for TCE.exp')
         self.offset_file_path = os.path.join(plugin_dir, 'offset')
+        self.route_store = RouteStore(os.path.join(plugin_dir, 'route.db'))
+        self.body_classifier = BodyClassifier(os.path.join(plugin_dir, 'body_classes.json'))
+        # Last route written to the store, so unchanged routes aren't rewritten
+        self.saved_route = None
+        self.systems_cache = SystemsCache(os.path.join(plugin_dir, 'systems_cache.json'))
+        self.systems_index = SystemsIndex(os.path.join(plugin_dir, 'systems.idx'))
         self.offset = 0
-        self.jumps_left = 0
-        self.error_txt = tk.StringVar()
+        # Tk variables need the main window, they're created with the GUI
+        self.error_txt = None
         self.plot_error = "Error while trying to plot a route, please try again."
         self.system_header = "System Name"
-        self.bodyname_header = "Body Name"
-        self.bodysubtype_header = "Body Subtype"
-        self.jumps_header = "Jumps"
-        self.restocktritium_header = "Restock Tritium"
-        self.refuel_header = "Refuel"
         self.pleaserefuel = False
+        self.plot_engine = None
+        self.plot_job = None
+        # Parameter sweep: jobs in flight or done, and the rows showing their results
+        self.sweep_efficiencies = [20, 40, 60, 80, 100]
+        self.max_sweep_jobs = 12
+        self.sweep_jobs = []
+        self.sweep_done = []
+        self.sweep_rows = []
+        # Routes Spansh already plotted, by plot parameters
+        self.route_cache = RouteCache(os.path.join(plugin_dir, 'route_cache'))
+        # Offline neutron plotter, loaded on first use when SpanshRouter_plotter is "local"
+        self.local_plotter = None
+        # Rows still being read by a file import
+        self.importing = None
+        self.import_chunk_size = 5000
+        # Background read of the saved route at startup, and the systems we reached meanwhile
+        self.restoring = None
+        self.restore_arrivals = []
+        # (position, distance) of the waypoint to get back on the route at, after a detour
+        self.rejoin = None
+        self.clipboard = None
+        # Last state applied to the widgets, so updates only touch what changed
+        self.view = ViewState()
+        # Counters and timings of the hot paths, off unless SpanshRouter_metrics is "log" or "json"
+        metrics.configure(config.get_str('SpanshRouter_metrics'), os.path.join(plugin_dir, 'metrics.json'),
+                          config.get_int('SpanshRouter_metrics_interval'))
+
+    @property
+    def jumps_left(self):
+        return self.route.jumps_left(self.offset)
+
+    @property
+    def roadtoriches(self):
+        return self.route.kind == "riches"
+
+    @property
+    def fleetcarrier(self):
+        return self.route.kind == "fleetcarrier"
+
+    @property
+    def galaxy(self):
+        return self.route.kind == "galaxy"
 
     #   -- GUI part --
     def init_gui(self, parent):
         self.parent = parent
         self.frame = tk.Frame(parent, borderwidth=2)
         self.frame.grid(sticky=tk.NSEW, columnspan=2)
+        self.plot_engine = PlotJobEngine(self.frame)
+        self.clipboard = create_clipboard(parent)
 
         # Route info
         self.waypoint_prev_btn = tk.Button(self.frame, text="^", command=self.goto_prev_waypoint)
-        self.waypoint_btn = tk.Button(self.frame, text=self.next_wp_label + '\n' + self.next_stop, command=self.copy_waypoint)
+        self.waypoint_btn = tk.Button(self.frame, text=self.next_wp_label + '\n' + self.next_stop, command=lambda: self.copy_waypoint(force=True))
         self.waypoint_next_btn = tk.Button(self.frame, text="v", command=self.goto_next_waypoint)
+        self.rejoin_btn = tk.Button(self.frame, command=self.rejoin_route)
         self.jumpcounttxt_lbl = tk.Label(self.frame, text=self.jumpcountlbl_txt + str(self.jumps_left))
         self.bodies_lbl = tk.Label(self.frame, justify=LEFT, text=self.bodieslbl_txt + self.bodies)
         self.fleetrestock_lbl = tk.Label(self.frame, justify=LEFT, text=self.fleetstocklbl_txt)
         self.refuel_lbl = tk.Label(self.frame, justify=LEFT, text=self.refuellbl_txt)
+        self.error_txt = tk.StringVar()
         self.error_lbl = tk.Label(self.frame, textvariable=self.error_txt)
+        self.progress_lbl = tk.Label(self.frame)
 
         # Plotting GUI
-        self.source_ac = AutoCompleter(self.frame, "Source System", width=30)
-        self.dest_ac = AutoCompleter(self.frame, "Destination System", width=30)
+        self.source_ac = AutoCompleter(self.frame, "Source System", cache=self.systems_cache, index=self.systems_index, width=30)
+        self.dest_ac = AutoCompleter(self.frame, "Destination System", cache=self.systems_cache, index=self.systems_index, width=30)
         self.range_entry = PlaceHolder(self.frame, "Range (LY)", width=10)
         self.efficiency_slider = tk.Scale(self.frame, from_=1, to=100, orient=tk.HORIZONTAL, label="Efficiency (%)")
         self.efficiency_slider.set(60)
+        self.sweep_entry = PlaceHolder(self.frame, "Sweep efficiencies (%)", width=20)
+        self.sweep_btn = tk.Button(self.frame, text="Sweep", command=self.sweep_routes)
+        # Sweep results, one row per plotted route, best first
+        self.sweep_frame = tk.Frame(self.frame)
         self.plot_gui_btn = tk.Button(self.frame, text="Plot route", command=self.show_plot_gui)
         self.plot_route_btn = tk.Button(self.frame, text="Calculate", command=self.plot_route)
-        self.cancel_plot = tk.Button(self.frame, text="Cancel", command=lambda: self.show_plot_gui(False))
+        self.cancel_plot = tk.Button(self.frame, text="Cancel", command=self.cancel_plot_route)
 
         self.csv_route_btn = tk.Button(self.frame, text="Import file", command=self.plot_file)
         self.export_route_btn = tk.Button(self.frame, text="Export for TCE", command=self.export_route)
@@ -99,6 +167,8 @@ class SpanshRouter():
         row += 1
         self.waypoint_next_btn.grid(row=row, columnspan=2)
         row += 1
+        self.rejoin_btn.grid(row=row, columnspan=2)
+        row += 1
         self.bodies_lbl.grid(row=row, columnspan=2, sticky=tk.W)
         row += 1
         self.fleetrestock_lbl.grid(row=row, columnspan=2, sticky=tk.W)
@@ -113,6 +183,11 @@ class SpanshRouter():
         row += 1
         self.efficiency_slider.grid(row=row, pady=10, columnspan=2, sticky=tk.EW)
         row += 1
+        self.sweep_entry.grid(row=row, sticky=tk.W)
+        self.sweep_btn.grid(row=row, column=1, padx=5, sticky=tk.W)
+        row += 1
+        self.sweep_frame.grid(row=row, columnspan=2, sticky=tk.EW)
+        row += 1
         self.csv_route_btn.grid(row=row, pady=10, padx=0)
         self.plot_route_btn.grid(row=row, pady=10, padx=0)
         self.plot_gui_btn.grid(row=row, column=1, pady=10, padx=5, sticky=tk.W)
@@ -124,7 +199,10 @@ class SpanshRouter():
         self.jumpcounttxt_lbl.grid(row=row, pady=5, sticky=tk.W)
         row += 1
         self.error_lbl.grid(row=row, columnspan=2)
-        self.error_lbl.grid_remove()
+        self.hide_error()
+        row += 1
+        self.progress_lbl.grid(row=row, columnspan=2)
+        self.show_progress()
         row += 1
 
         # Check if we're having a valid range on the fly
@@ -132,43 +210,24 @@ class SpanshRouter():
 
         self.show_plot_gui(False)
 
-        if not self.route.__len__() > 0:
-            self.waypoint_prev_btn.grid_remove()
-            self.waypoint_btn.grid_remove()
-            self.waypoint_next_btn.grid_remove()
-            self.jumpcounttxt_lbl.grid_remove()
-            self.bodies_lbl.grid_remove()
-            self.fleetrestock_lbl.grid_remove()
-            self.export_route_btn.grid_remove()
-            self.clear_route_btn.grid_remove()
-
-        self.update_gui()
+        # Rebuild the offline systems index in the background if a newer dump was dropped in the plugin folder
+        self.systems_index.update_from_dump()
 
         return self.frame
 
     def show_plot_gui(self, show=True):
+        plot_widgets = (self.source_ac, self.dest_ac, self.range_entry, self.efficiency_slider,
+                        self.sweep_entry, self.sweep_btn, self.plot_route_btn, self.cancel_plot)
         if show:
-            self.waypoint_prev_btn.grid_remove()
-            self.waypoint_btn.grid_remove()
-            self.waypoint_next_btn.grid_remove()
-            self.jumpcounttxt_lbl.grid_remove()
-            self.bodies_lbl.grid_remove()
-            self.fleetrestock_lbl.grid_remove()
-            self.export_route_btn.grid_remove()
-            self.clear_route_btn.grid_remove()
-
-            self.plot_gui_btn.grid_remove()
-            self.csv_route_btn.grid_remove()
-            self.source_ac.grid()
             # Prefill the "Source" entry with the current system
             self.source_ac.set_text(monitor.state['SystemName'] if monitor.state['SystemName'] is not None else "Source System", monitor.state['SystemName'] is None)
-            self.dest_ac.grid()
-            self.range_entry.grid()
-            self.efficiency_slider.grid()
-            self.plot_route_btn.grid()
-            self.cancel_plot.grid()
 
-            self.show_route_gui(False)
+            view = self.route_view(False)
+            for widget in plot_widgets:
+                view[widget] = (True, {})
+            view[self.plot_gui_btn] = (False, {})
+            view[self.csv_route_btn] = (False, {})
+            view[self.sweep_frame] = (len(self.sweep_rows) > 0, {})
 
         else:
             if len(self.source_ac.var.get()) == 0:
@@ -176,17 +235,16 @@ class SpanshRouter():
             if len(self.dest_ac.var.get()) == 0:
                 self.dest_ac.put_placeholder()
             self.source_ac.hide_list()
-            self.source_ac.grid_remove()
             self.dest_ac.hide_list()
-            self.dest_ac.grid_remove()
-            self.range_entry.grid_remove()
-            self.efficiency_slider.grid_remove()
-            self.plot_gui_btn.grid_remove()
-            self.plot_route_btn.grid_remove()
-            self.cancel_plot.grid_remove()
-            self.plot_gui_btn.grid()
-            self.csv_route_btn.grid()
-            self.show_route_gui(True)
+
+            view = self.route_view(True)
+            for widget in plot_widgets:
+                view[widget] = (False, {})
+            view[self.plot_gui_btn] = (True, {})
+            view[self.csv_route_btn] = (True, {})
+            view[self.sweep_frame] = (False, {})
+
+        self.view.render(view)
 
     def set_source_ac(self, text):
         self.source_ac.delete(0, tk.END)
@@ -194,155 +252,196 @@ class SpanshRouter():
         self.source_ac.set_default_style()
 
     def show_route_gui(self, show):
-        self.hide_error()
+        self.view.render(self.route_view(show))
+
+    def route_view(self, show):
+        # What the route part of the frame should look like, as (visible, options) per widget
+        view = {self.error_lbl: (False, {})}
+        for widget in (self.waypoint_prev_btn, self.waypoint_btn, self.waypoint_next_btn, self.rejoin_btn,
+                       self.jumpcounttxt_lbl, self.bodies_lbl, self.fleetrestock_lbl, self.refuel_lbl,
+                       self.export_route_btn, self.clear_route_btn):
+            view[widget] = (False, {})
         if not show or not self.route.__len__() > 0:
-            self.waypoint_prev_btn.grid_remove()
-            self.waypoint_btn.grid_remove()
-            self.waypoint_next_btn.grid_remove()
-            self.jumpcounttxt_lbl.grid_remove()
-            self.bodies_lbl.grid_remove()
-            self.fleetrestock_lbl.grid_remove()
-            self.refuel_lbl.grid_remove()
-            self.export_route_btn.grid_remove()
-            self.clear_route_btn.grid_remove()
-        else:
-            self.waypoint_btn["text"] = self.next_wp_label + '\n' + self.next_stop
-            if self.jumps_left > 0:
-                self.jumpcounttxt_lbl["text"] = self.jumpcountlbl_txt + str(self.jumps_left)
-                self.jumpcounttxt_lbl.grid()
-            else:
-                self.jumpcounttxt_lbl.grid_remove()
-
-            if self.roadtoriches:
-                self.bodies_lbl["text"] = self.bodieslbl_txt + self.bodies
-                self.bodies_lbl.grid()
-            else:
-                self.bodies_lbl.grid_remove()
-
-            self.fleetrestock_lbl.grid_remove()
-            if self.fleetcarrier:
-                if self.offset > 0:
-                    restock = self.route[self.offset - 1][2]
-                    if restock.lower() == "yes":
-                        self.fleetrestock_lbl["text"] = f"At: {self.route[self.offset - 1][0]}\n   {self.fleetstocklbl_txt}" 
-                        self.fleetrestock_lbl.grid()
-
-            if self.galaxy:
-                if self.pleaserefuel:
-                    self.refuel_lbl['text'] = self.refuellbl_txt
-                    self.refuel_lbl.grid()
-                else:
-                    self.refuel_lbl.grid_remove()
-
-            self.waypoint_prev_btn.grid()
-            self.waypoint_btn.grid()
-            self.waypoint_next_btn.grid()
-
-            if self.offset == 0:
-                self.waypoint_prev_btn.config(state=tk.DISABLED)
-            else:
-                self.waypoint_prev_btn.config(state=tk.NORMAL)
-
-                if self.offset == self.route.__len__()-1:
-                    self.waypoint_next_btn.config(state=tk.DISABLED)
-                else:
-                    self.waypoint_next_btn.config(state=tk.NORMAL)
-
-            self.export_route_btn.grid()
-            self.clear_route_btn.grid()
+            return view
+
+        view[self.waypoint_btn] = (True, {"text": self.next_wp_label + '\n' + self.next_stop})
+        if self.jumps_left > 0:
+            view[self.jumpcounttxt_lbl] = (True, {"text": self.jumpcountlbl_txt + str(self.jumps_left) + self.route_totals_text()})
+
+        if self.roadtoriches:
+            view[self.bodies_lbl] = (True, {"text": self.bodieslbl_txt + self.bodies})
+
+        if self.fleetcarrier:
+            if self.offset > 0:
+                waypoint = self.route[self.offset - 1]
+                if waypoint.restock:
+                    view[self.fleetrestock_lbl] = (True, {"text": f"At: {waypoint.system}\n   {self.fleetstocklbl_txt}"})
+
+        if self.galaxy and self.pleaserefuel:
+            view[self.refuel_lbl] = (True, {"text": self.refuellbl_txt})
+
+        if self.rejoin is not None:
+            position, distance = self.rejoin
+            view[self.rejoin_btn] = (True, {"text": f"Rejoin route at {self.route[position].system} ({distance:,.0f} Ly)"})
+
+        view[self.waypoint_prev_btn] = (True, {"state": tk.DISABLED if self.offset == 0 else tk.NORMAL})
+        view[self.waypoint_next_btn] = (True, {"state": tk.DISABLED if self.offset >= self.route.__len__() - 1 else tk.NORMAL})
+        view[self.export_route_btn] = (True, {})
+        view[self.clear_route_btn] = (True, {})
+        return view
+
+    def route_totals_text(self):
+        text = ""
+        distance_left = self.route.distance_left(self.offset)
+        if distance_left is not None:
+            text += f"\nDistance left: {distance_left:,.0f} Ly"
+        if self.route.has_fuel:
+            text += f"\nFuel to go: {self.route.fuel_left(self.offset):,.1f} t"
+        if self.route.has_value:
+            text += f"\nScan value left: {self.route.value_left(self.offset):,} Cr"
+        return text
 
     def update_gui(self):
         self.show_route_gui(True)
 
     def show_error(self, error):
         self.error_txt.set(error)
-        self.error_lbl.grid()
+        self.view.render({self.error_lbl: (True, {})})
 
     def hide_error(self):
-        self.error_lbl.grid_remove()
+        self.view.render({self.error_lbl: (False, {})})
+
+    def show_progress(self, text=None):
+        if text is None:
+            self.view.render({self.progress_lbl: (False, {})})
+        else:
+            self.view.render({self.progress_lbl: (True, {"text": text})})
 
     def enable_plot_gui(self, enable):
+        state = tk.NORMAL if enable else tk.DISABLED
+        view = {}
+        for widget in (self.source_ac, self.dest_ac, self.efficiency_slider, self.range_entry, self.sweep_entry,
+                       self.sweep_btn):
+            view[widget] = (None, {"state": state})
+        view[self.plot_route_btn] = (None, {"state": state, "text": "Calculate" if enable else "Computing..."})
         if enable:
-            self.source_ac.config(state=tk.NORMAL)
-            self.source_ac.update_idletasks()
-            self.dest_ac.config(state=tk.NORMAL)
-            self.dest_ac.update_idletasks()
-            self.efficiency_slider.config(state=tk.NORMAL)
-            self.efficiency_slider.update_idletasks()
-            self.range_entry.config(state=tk.NORMAL)
-            self.range_entry.update_idletasks()
-            self.plot_route_btn.config(state=tk.NORMAL, text="Calculate")
-            self.plot_route_btn.update_idletasks()
-            self.cancel_plot.config(state=tk.NORMAL)
-            self.cancel_plot.update_idletasks()
-        else:
-            self.source_ac.config(state=tk.DISABLED)
-            self.source_ac.update_idletasks()
-            self.dest_ac.config(state=tk.DISABLED)
-            self.dest_ac.update_idletasks()
-            self.efficiency_slider.config(state=tk.DISABLED)
-            self.efficiency_slider.update_idletasks()
-            self.range_entry.config(state=tk.DISABLED)
-            self.range_entry.update_idletasks()
-            self.plot_route_btn.config(state=tk.DISABLED, text="Computing...")
-            self.plot_route_btn.update_idletasks()
-            self.cancel_plot.config(state=tk.DISABLED)
-            self.cancel_plot.update_idletasks()
+            view[self.cancel_plot] = (None, {"state": tk.NORMAL})
+        self.view.render(view)
 
     #   -- END GUI part --
 
 
     def open_last_route(self):
-        try:
-            has_headers = False
-            with open(self.save_route_path, 'r', newline='') as csvfile:
-                # Check if the file has a header for compatibility with previous versions
-                dict_route_reader = csv.DictReader(csvfile)
-                if dict_route_reader.fieldnames[0] == self.system_header:
-                    has_headers = True
+        # The saved route is read in the background so a big one doesn't hold up EDMC's startup
+        migrate = self.migrate_csv_route if os.path.exists(self.save_route_path) else None
+        self.restoring = RouteLoader(self.route_store, self.prepare_waypoint, migrate)
+        self.restore_arrivals = []
+        # The store already holds what we're loading, nothing to write back until it's in
+        self.saved_route = self.route
+        self.show_progress("Loading route...")
+        self.restoring.start()
+        self.frame.after(50, self.poll_restore, self.restoring)
+
+    def poll_restore(self, loader):
+        if loader is not self.restoring:
+            # The route was cleared or replaced in the meantime
+            return
 
-            if has_headers:
-                self.plot_csv(self.save_route_path, clear_previous_route=False)
-            else:
-                with open(self.save_route_path, 'r', newline='') as csvfile:
-                    route_reader = csv.reader(csvfile)
+        try:
+            while 1:
+                result = loader.results.get_nowait()
+                if result[0] == "waypoint":
+                    self.show_restored_waypoint(*result[1:])
+                else:
+                    self.restore_done(result[1])
+                    return
+        except queue.Empty:
+            pass
 
-                    for row in route_reader:
-                        if row not in (None, "", []):
-                            self.route.append(row)
+        self.frame.after(50, self.poll_restore, loader)
 
-            try:
-                with open(self.offset_file_path, 'r') as offset_fh:
-                    self.offset = int(offset_fh.readline())
+    def show_restored_waypoint(self, kind, offset, waypoint):
+        if waypoint is None:
+            return
 
-            except:
-                self.offset = 0
+        self.offset = offset
+        self.next_stop = waypoint.system
+        self.pleaserefuel = kind == "galaxy" and waypoint.refuel
+        self.copy_waypoint()
+        self.view.render({self.waypoint_btn: (True, {"text": self.next_wp_label + '\n' + self.next_stop})})
 
-            self.jumps_left = 0
-            for row in self.route[self.offset:]:
-                if row[1] not in [None, "", []]:
-                    self.jumps_left += int(row[1])
+    def restore_done(self, route):
+        self.restoring = None
+        self.show_progress()
 
-            self.next_stop = self.route[self.offset][0]
-            self.update_bodies_text()
-            self.copy_waypoint()
+        if route is None or route.__len__() == 0:
+            logger.info("No previously saved route")
             self.update_gui()
+        else:
+            self.route = route
+            self.saved_route = route
+            self.set_offset(self.route_store.load_offset())
+
+        # Catch up with the jumps made while loading
+        arrivals, self.restore_arrivals = self.restore_arrivals, []
+        for system, star_pos in arrivals:
+            if self.arrived_at(system, star_pos):
+                self.set_source_ac(system)
+
+    def migrate_csv_route(self):
+        # Routes saved by previous versions as route.csv + offset files.
+        # Runs on the loader thread, so it builds its own route and leaves ours alone
+        try:
+            self.read_csv_route()
+        except:
+            # Moved aside, so it isn't tried again at every startup
+            failed_path = self.save_route_path + ".failed"
+            os.replace(self.save_route_path, failed_path)
+            logger.warning(f"Could not migrate the saved route, moved it to {failed_path}")
+            raise
+
+    def read_csv_route(self):
+        route = Route()
+        has_headers = False
+        with open(self.save_route_path, 'r', newline='') as csvfile:
+            # Check if the file has a header for compatibility with previous versions
+            dict_route_reader = csv.DictReader(csvfile)
+            if dict_route_reader.fieldnames[0] == self.system_header:
+                has_headers = True
+
+        if has_headers:
+            with io.open(self.save_route_path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+                route_format, rows = read_route(csvfile)
+                if route_format is not None:
+                    route.kind = route_format.kind
+                    for waypoint in rows:
+                        route.append(waypoint)
+        else:
+            with open(self.save_route_path, 'r', newline='') as csvfile:
+                route_reader = csv.reader(csvfile)
 
-        except IOError:
-            logger.info("No previously saved route")
+                for row in route_reader:
+                    if row not in (None, "", []):
+                        route.append(Waypoint(row[0], int(row[1]) if row[1] else 0))
+
+        try:
+            with open(self.offset_file_path, 'r') as offset_fh:
+                offset = int(offset_fh.readline())
         except:
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-            logger.warning(''.join('!! ' + line for line in lines))
+            offset = 0
 
-    def copy_waypoint(self):
-        if sys.platform == "linux" or sys.platform == "linux2":
-            command = subprocess.Popen(["echo", "-n", self.next_stop], stdout=subprocess.PIPE)
-            subprocess.Popen(["xclip", "-selection", "c"], stdin=command.stdout)
-        else:
-            self.parent.clipboard_clear()
-            self.parent.clipboard_append(self.next_stop)
-            self.parent.update()
+        self.route_store.save_route(route, offset)
+        logger.info(f"Migrated the saved route to {self.route_store.path}")
+        for path in (self.save_route_path, self.offset_file_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def copy_waypoint(self, force=False):
+        # Skipped when the clipboard already holds the waypoint, unless the user asked for it
+        metrics.count("waypoint.copy")
+        self.clipboard.copy(self.next_stop, force)
 
     def goto_next_waypoint(self):
         if self.offset < self.route.__len__()-1:
@@ -353,38 +452,76 @@ class SpanshRouter():
             self.update_route(-1)
 
     def update_route(self, direction=1):
-        if direction > 0:
-            if self.route[self.offset][1] not in [None, "", []]:
-                if not self.galaxy:
-                    self.jumps_left -= int(self.route[self.offset][1])
-                else:
-                    self.jumps_left -= 1
-            self.offset += 1
-        else:
-            self.offset -= 1
-            if self.route[self.offset][1] not in [None, "", []]:
-                if not self.galaxy:
-                    self.jumps_left += int(self.route[self.offset][1])
-                else:
-                    self.jumps_left += 1
+        self.set_offset(self.offset + (1 if direction > 0 else -1))
+
+    def find_waypoint(self, system):
+        # First occurrence of the system from the current one onwards
+        position = self.route.find(system, max(self.offset - 1, 0))
+        if position == self.offset - 1:
+            # We're already there
+            return None
+        return position
+
+    def arrived_at(self, system, star_pos=None):
+        if self.restoring is not None:
+            # Replayed once the saved route is loaded
+            self.restore_arrivals.append((system, star_pos))
+            return False
+
+        position = self.find_waypoint(system)
+        if position is None:
+            if star_pos is not None and self.route.find(system) is None:
+                return self.left_route(star_pos)
+            return False
+        self.set_offset(position + 1)
+        return True
+
+    def left_route(self, star_pos):
+        # We're somewhere the route doesn't go, the closest waypoint still ahead is where to get back on it
+        with metrics.timer("route.nearest"):
+            rejoin = self.route.nearest(star_pos, self.offset)
+        if rejoin is None or rejoin[0] == self.offset:
+            # Still heading for the next stop
+            if self.rejoin is not None:
+                self.rejoin = None
+                self.update_gui()
+            return False
+
+        metrics.count("route.rejoins")
+        if config.get_int('SpanshRouter_autorejoin'):
+            self.set_offset(rejoin[0])
+            return True
+        self.rejoin = rejoin
+        self.update_gui()
+        return False
 
-        if self.offset >= self.route.__len__():
-            self.next_stop = "End of the road!"
-            self.update_gui()
-        else:
-            self.next_stop = self.route[self.offset][0]
-            self.update_bodies_text()
+    def rejoin_route(self):
+        if self.rejoin is not None:
+            self.set_offset(self.rejoin[0])
 
-            if self.galaxy:
-                self.pleaserefuel = self.route[self.offset][1] == "Yes"
+    def set_offset(self, offset):
+        with metrics.timer("route.advance"):
+            self.offset = offset
+            self.rejoin = None
 
-            self.update_gui()
-            self.copy_waypoint()
-        self.save_offset()
+            if self.offset >= self.route.__len__():
+                self.next_stop = "End of the road!"
+                self.update_gui()
+            else:
+                self.next_stop = self.route[self.offset].system
+                self.update_bodies_text()
+
+                if self.galaxy:
+                    self.pleaserefuel = self.route[self.offset].refuel
+
+                self.update_gui()
+                self.copy_waypoint()
+            self.save_offset()
 
     def goto_changelog_page(self):
         changelog_url = 'https://github.com/CMDR-Kiel42/EDMC_SpanshRouter/blob/master/CHANGELOG.md#'
         changelog_url += self.spansh_updater.version.replace('.', '')
+        import webbrowser
         webbrowser.open(changelog_url)
 
     def plot_file(self):
@@ -393,157 +530,98 @@ class SpanshRouter():
             ('CSV files', '*.csv'),
             ('Text files', '*.txt'),
         ]
+        import tkinter.filedialog as filedialog
         filename = filedialog.askopenfilename(filetypes = ftypes, initialdir=os.path.expanduser('~'))
 
         if filename.__len__() > 0:
-            try:
-                ftype_supported = False
-                if filename.endswith(".csv"):
-                    ftype_supported = True
-                    self.plot_csv(filename)
-
-                elif filename.endswith(".txt"):
-                    ftype_supported = True
-                    self.plot_edts(filename)
-
-                if ftype_supported:
-                    self.offset = 0
-                    self.next_stop = self.route[0][0]
-                    if self.galaxy:
-                        self.pleaserefuel = self.route[0][1] == "Yes"
-                    self.update_bodies_text()
-                    self.copy_waypoint()
-                    self.update_gui()
-                    self.save_all_route()
-                else:
-                    self.show_error("Unsupported file type")
-            except:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-                logger.warning(''.join('!! ' + line for line in lines))
-                self.enable_plot_gui(True)
-                self.show_error("(1) An error occured while reading the file.")
-
-    def plot_csv(self, filename, clear_previous_route=True):
-       with io.open(filename, 'r', encoding='utf-8-sig', newline='') as csvfile:
-            self.roadtoriches = False
-            self.fleetcarrier = False
-            self.galaxy = False
-        
-            if clear_previous_route:
+            if filename.endswith(".csv"):
                 self.clear_route(False)
-            
-            route_reader = csv.DictReader(csvfile)
-            
-            # Get column header names as string
-            headerline = ','.join(route_reader.fieldnames)
-
-            # Define the differnt internal formats based on the CSV header row
-            internalbasicheader1 = "System Name"
-            internalbasicheader2 = "System Name,Jumps"
-            internalrichesheader = "System Name,Jumps,Body Name,Body Subtype"
-            internalfleetcarrierheader = "System Name,Jumps,Restock Tritium"
-            internalgalaxyheader = "System Name,Refuel"
-            # Define the differnt import file formats based on the CSV header row
-            neutronimportheader = "System Name,Distance To Arrival,Distance Remaining,Neutron Star,Jumps"
-            road2richesimportheader = "System Name,Body Name,Body Subtype,Is Terraformable,Distance To Arrival,Estimated Scan Value,Estimated Mapping Value,Jumps"
-            fleetcarrierimportheader = "System Name,Distance,Distance Remaining,Fuel Used,Icy Ring,Pristine,Restock Tritium"
-            galaxyimportheader = "System Name,Distance,Distance Remaining,Fuel Left,Fuel Used,Refuel,Neutron Star"
-
-            if (headerline == internalbasicheader1) or (headerline == internalbasicheader2) or (headerline == neutronimportheader):
-                for row in route_reader:
-                    if row not in (None, "", []):
-                        self.route.append([
-                            row[self.system_header],
-                            row.get(self.jumps_header, "") # Jumps column is optional
-                        ])
-                        if row.get(self.jumps_header): # Jumps column is optional
-                            self.jumps_left += int(row[self.jumps_header])
-
-            elif headerline == internalrichesheader:
-                self.roadtoriches = True
-
-                for row in route_reader:
-                    if row not in (None, "", []):
-                        # Convert string representations of lists to actual Lists
-                        bodynames = ast.literal_eval(row[self.bodyname_header])
-                        bodysubtypes = ast.literal_eval(row[self.bodysubtype_header])
+                self.import_route(self.read_csv(filename))
 
-                        self.route.append([
-                            row[self.system_header],
-                            row[self.jumps_header],
-                            bodynames,
-                            bodysubtypes
-                        ])
-                        self.jumps_left += int(row[self.jumps_header])
+            elif filename.endswith(".txt"):
+                self.clear_route(False)
+                self.import_route(self.read_edts(filename))
 
-            elif headerline == internalfleetcarrierheader:
-                self.fleetcarrier = True
+            else:
+                self.show_error("Unsupported file type")
 
-                for row in route_reader:
-                    if row not in (None, "", []):
-                        self.route.append([
-                            row[self.system_header],
-                            row[self.jumps_header],
-                            row[self.restocktritium_header]
-                        ])
-                        self.jumps_left += int(row[self.jumps_header])
+    def import_route(self, rows):
+        # Rows are pulled in chunks from the Tk loop, so huge files never freeze EDMC
+        self.importing = rows
+        self.offset = 0
+        self.import_next_chunk(rows)
 
-            elif headerline == road2richesimportheader:
-                self.roadtoriches = True
+    def import_next_chunk(self, rows):
+        if rows is not self.importing:
+            # The route was cleared or another file imported in the meantime
+            return
 
-                bodynames = []
-                bodysubtypes = []
+        first_chunk = self.route.__len__() == 0
+        # Read a single waypoint first so it can be copied right away
+        chunk_size = 1 if first_chunk else self.import_chunk_size
+        try:
+            count = 0
+            with metrics.timer("route.import_chunk"):
+                for row in islice(rows, chunk_size):
+                    self.add_waypoint(row)
+                    count += 1
+            metrics.count("route.imported_waypoints", count)
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            self.importing = None
+            self.show_progress()
+            self.enable_plot_gui(True)
+            self.show_error("(1) An error occured while reading the file.")
+            return
 
-                for row in route_reader:
-                    bodyname = row[self.bodyname_header]
-                    bodysubtype = row[self.bodysubtype_header]
+        if self.route.__len__() == 0:
+            self.importing = None
+            return
 
-                    # Update the current system with additional bodies from new CSV row
-                    if self.route.__len__() > 0 and row[self.system_header] == self.route[-1][0]:
-                        self.route[-1][2].append(bodyname)
-                        self.route[-1][3].append(bodysubtype)
-                        continue
+        if first_chunk:
+            self.next_stop = self.route[0].system
+            if self.galaxy:
+                self.pleaserefuel = self.route[0].refuel
+            self.copy_waypoint()
+            self.update_gui()
 
-                    if row not in (None, "", []):
-                        bodynames.append(bodyname)
-                        bodysubtypes.append(bodysubtype)
+        if count == chunk_size:
+            self.show_progress(f"Loading route... {self.route.__len__()} waypoints")
+            self.frame.after(1, self.import_next_chunk, rows)
+        else:
+            self.importing = None
+            self.show_progress()
+            self.update_bodies_text()
+            self.update_gui()
+            self.save_all_route()
 
-                        self.route.append([
-                            row[self.system_header],
-                            row[self.jumps_header],
-                            bodynames.copy(),
-                            bodysubtypes.copy()
-                        ])
-                        # Clear bodies for next system
-                        bodynames.clear()
-                        bodysubtypes.clear()
+    def add_waypoint(self, waypoint):
+        self.prepare_waypoint(waypoint)
+        self.route.append(waypoint)
 
-                        self.jumps_left += int(row[self.jumps_header])
+    def prepare_waypoint(self, waypoint):
+        if waypoint.body_names is not None:
+            waypoint.bodies_text = self.body_classifier.summarize(waypoint.system, waypoint.body_names, waypoint.body_subtypes)
 
-            elif headerline == fleetcarrierimportheader:
-                self.fleetcarrier = True
+    def plot_csv(self, filename, clear_previous_route=True):
+        if clear_previous_route:
+            self.clear_route(False)
 
-                for row in route_reader:
-                    if row not in (None, "", []):
-                        self.route.append([
-                            row[self.system_header],
-                            1, # Jumps is faked as every row is 1 jump
-                            row[self.restocktritium_header]
-                        ])
-                        self.jumps_left += 1 # Jumps is faked as every row is 1 jump
-            elif (headerline == internalgalaxyheader) or (headerline == galaxyimportheader):
-                self.galaxy = True
+        with metrics.timer("route.parse"):
+            for waypoint in self.read_csv(filename):
+                self.add_waypoint(waypoint)
 
-                for row in route_reader:
-                    if row not in (None, "", []):
-                        self.route.append([
-                            row[self.system_header],
-                            row[self.refuel_header]
-                        ])
-                        self.jumps_left += 1
-            else:
+    def read_csv(self, filename):
+        with io.open(filename, 'r', encoding='utf-8-sig', newline='') as csvfile:
+            route_format, rows = read_route(csvfile)
+            if route_format is None:
                 self.show_error("Could not detect file format")
+                return
+
+            self.route.kind = route_format.kind
+            yield from rows
 
     def plot_route(self):
         self.hide_error()
@@ -560,79 +638,32 @@ class SpanshRouter():
                     dest    and dest != self.dest_ac.placeholder    ):
 
                 try:
-                    range_ly = float(self.range_entry.get())
+                    ranges = parse_values(self.range_entry.get(), float)
                 except ValueError:
                     self.show_error("Invalid range")
                     return
+                if len(ranges) > 1:
+                    self.show_error("Use Sweep to compare several ranges")
+                    return
+                range_ly = ranges[0]
 
-                job_url="https://spansh.co.uk/api/route?"
-
-                results = requests.post(job_url, params={
+                params = {
                     "efficiency": efficiency,
                     "range": range_ly,
                     "from": source,
                     "to": dest
-                }, headers={'User-Agent': "EDMC_SpanshRouter 1.0"})
-
-                if results.status_code == 202:
-                    self.enable_plot_gui(False)
-
-                    tries = 0
-                    while(tries < 20):
-                        response = json.loads(results.content)
-                        job = response["job"]
-
-                        results_url = "https://spansh.co.uk/api/results/" + job
-                        route_response = requests.get(results_url, timeout=5)
-                        if route_response.status_code != 202:
-                            break
-                        tries += 1
-                        sleep(1)
-
-                    if route_response:
-                        if route_response.status_code == 200:
-                            route = json.loads(route_response.content)["result"]["system_jumps"]
-                            self.clear_route(show_dialog=False)
-                            for waypoint in route:
-                                self.route.append([waypoint["system"], str(waypoint["jumps"])])
-                                self.jumps_left += waypoint["jumps"]
-                            self.enable_plot_gui(True)
-                            self.show_plot_gui(False)
-                            self.offset = 1 if self.route[0][0] == monitor.state['SystemName'] else 0
-                            self.next_stop = self.route[self.offset][0]
-                            self.copy_waypoint()
-                            self.update_gui()
-                            self.save_all_route()
-                        else:
-                            logger.warning(f"Failed to query plotted route from Spansh, code: {str(route_response.status_code)}; text: {route_response.text}")
-                            self.enable_plot_gui(True)
-                            failure = json.loads(results.content)
-
-                            if route_response.status_code == 400 and "error" in failure:
-                                self.show_error(failure["error"])
-                                if "starting system" in failure["error"]:
-                                    self.source_ac["fg"] = "red"
-                                if "finishing system" in failure["error"]:
-                                    self.dest_ac["fg"] = "red"
-                            else:
-                                self.show_error(self.plot_error)
-                    else:
-                        logger.warning("Query to Spansh timed out")
-                        self.enable_plot_gui(True)
-                        self.show_error("The query to Spansh was too long and timed out, please try again.")
-                else:
-                    logger.warning(f"Failed to query plotted route from Spansh: code {str(results.status_code)}; text: {results.text}")
-                    self.enable_plot_gui(True)
-                    failure = json.loads(results.content)
-
-                    if results.status_code == 400 and "error" in failure:
-                        self.show_error(failure["error"])
-                        if "starting system" in failure["error"]:
-                            self.source_ac["fg"] = "red"
-                        if "finishing system" in failure["error"]:
-                            self.dest_ac["fg"] = "red"
-                    else:
-                        self.show_error(self.plot_error)
+                }
+                job = self.create_plot_job(params, self.plot_route_done)
+                route = self.route_cache.get(params) if job.cache is not None else None
+                if route is not None:
+                    # Already plotted with these parameters, no need to ask Spansh again
+                    metrics.count("plot.cache_hits")
+                    job.route = route
+                    self.plot_route_done(job)
+                    return
+
+                self.enable_plot_gui(False)
+                self.plot_job = self.plot_engine.submit(job)
 
         except:
             exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -641,51 +672,221 @@ class SpanshRouter():
             self.enable_plot_gui(True)
             self.show_error(self.plot_error)
 
-    def plot_edts(self, filename):
+    def create_plot_job(self, params, callback):
+        if config.get_str('SpanshRouter_plotter') == "local":
+            local_plotter = self.get_local_plotter()
+            if local_plotter is not None:
+                from .NeutronPlotter import LocalPlotJob
+                return LocalPlotJob(params, callback, local_plotter)
+        return PlotJob(params, callback, cache=self.route_cache)
+
+    def get_local_plotter(self):
+        # None when numpy or the star catalog is missing, routes then come from Spansh
+        if self.local_plotter is None:
+            try:
+                from .NeutronPlotter import LocalPlotter
+            except ImportError:
+                logger.warning("numpy is needed to plot routes locally, plotting with Spansh instead")
+                return None
+            self.local_plotter = LocalPlotter(self.plugin_dir)
+
+        if not self.local_plotter.available():
+            logger.warning(f"No neutron_catalog.csv in {self.plugin_dir}, plotting with Spansh instead")
+            return None
+        return self.local_plotter
+
+    def plot_route_done(self, job):
+        self.plot_job = None
+        self.enable_plot_gui(True)
+
+        if job.route:
+            self.adopt_plotted_route(job.route)
+        elif job.timed_out:
+            self.show_error("The query to Spansh was too long and timed out, please try again.")
+        elif job.error:
+            self.show_error(job.error)
+            if "starting system" in job.error:
+                self.source_ac["fg"] = "red"
+            if "finishing system" in job.error:
+                self.dest_ac["fg"] = "red"
+        else:
+            self.show_error(self.plot_error)
+
+    def adopt_plotted_route(self, system_jumps):
+        self.clear_sweep()
+        self.clear_route(show_dialog=False)
+        for waypoint in system_jumps:
+            coords = (waypoint["x"], waypoint["y"], waypoint["z"]) if "x" in waypoint else None
+            self.add_waypoint(Waypoint(waypoint["system"], waypoint["jumps"],
+                                       distance_remaining=waypoint.get("distance_left"), coords=coords))
+        self.show_plot_gui(False)
+        self.offset = 1 if self.route[0].system == monitor.state['SystemName'] else 0
+        self.next_stop = self.route[self.offset].system
+        self.copy_waypoint()
+        self.update_gui()
+        self.save_all_route()
+
+    def cancel_plot_route(self):
+        if self.plot_job:
+            self.plot_job.cancel()
+            self.plot_job = None
+            self.enable_plot_gui(True)
+        self.clear_sweep()
+        self.show_plot_gui(False)
+
+    def sweep_routes(self):
+        # Plots the route for every efficiency and range given at once, so they can be compared.
+        # The plot engine only runs max_workers jobs at a time, the rest wait their turn
+        self.hide_error()
         try:
-            with open(filename, 'r') as txtfile:
-                route_txt = txtfile.readlines()
-                self.clear_route(False)
-                for row in route_txt:
-                    if row not in (None, "", []):
-                        if row.lstrip().startswith('==='):
-                            jumps = int(re.findall("\d+ jump", row)[0].rstrip(' jumps'))
-                            self.jumps_left += jumps
-
-                            system = row[row.find('>') + 1:]
-                            if ',' in system:
-                                systems = system.split(',')
-                                for system in systems:
-                                    self.route.append([system.strip(), jumps])
-                                    jumps = 1
-                                    self.jumps_left += jumps
-                            else:
-                                self.route.append([system.strip(), jumps])
+            source = self.source_ac.get().strip()
+            dest = self.dest_ac.get().strip()
+            self.source_ac.hide_list()
+            self.dest_ac.hide_list()
+
+            if not (source and source != self.source_ac.placeholder and
+                    dest and dest != self.dest_ac.placeholder):
+                return
+
+            try:
+                ranges = parse_values(self.range_entry.get(), float)
+            except ValueError:
+                self.show_error("Invalid range")
+                return
+
+            efficiencies = self.sweep_efficiencies
+            text = self.sweep_entry.get()
+            if text.strip() and text != self.sweep_entry.placeholder:
+                try:
+                    efficiencies = parse_values(text, int)
+                    if not all(1 <= efficiency <= 100 for efficiency in efficiencies):
+                        raise ValueError(text)
+                except ValueError:
+                    self.show_error("Efficiencies must be numbers from 1 to 100")
+                    return
+
+            combinations = [(efficiency, range_ly) for range_ly in ranges for efficiency in efficiencies]
+            if len(combinations) > self.max_sweep_jobs:
+                # Every one of them is a job on Spansh, don't plot a part of the sweep behind the user's back
+                self.show_error(f"A sweep plots at most {self.max_sweep_jobs} routes, "
+                                f"{len(combinations)} asked: use fewer efficiencies or ranges")
+                return
+
+            self.clear_sweep()
+            self.enable_plot_gui(False)
+            for efficiency, range_ly in combinations:
+                self.sweep_jobs.append(self.create_plot_job({
+                    "efficiency": efficiency,
+                    "range": range_ly,
+                    "from": source,
+                    "to": dest
+                }, self.sweep_route_done))
+
+            for job in self.sweep_jobs:
+                job.route = self.route_cache.get(job.params) if job.cache is not None else None
+                if job.route is not None:
+                    metrics.count("plot.cache_hits")
+                    self.sweep_route_done(job)
+                else:
+                    self.plot_engine.submit(job)
+            self.show_sweep_progress()
+
         except:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
             logger.warning(''.join('!! ' + line for line in lines))
+            self.clear_sweep()
             self.enable_plot_gui(True)
-            self.show_error("(2) An error occured while reading the file.")
+            self.show_error(self.plot_error)
+
+    def sweep_route_done(self, job):
+        if job not in self.sweep_jobs:
+            # Left over from a sweep that was cancelled
+            return
+
+        self.sweep_done.append(job)
+        self.show_sweep_results()
+        self.show_sweep_progress()
+        if len(self.sweep_done) == len(self.sweep_jobs):
+            self.enable_plot_gui(True)
+
+    def show_sweep_progress(self):
+        if len(self.sweep_done) < len(self.sweep_jobs):
+            self.show_progress(f"Plotting... {len(self.sweep_done)}/{len(self.sweep_jobs)} routes")
+        else:
+            self.show_progress()
+
+    def show_sweep_results(self):
+        for row in self.sweep_rows:
+            for widget in row:
+                widget.destroy()
+        self.sweep_rows = []
+
+        # Fewest jumps first, failures last
+        results = sorted(self.sweep_done, key=lambda job: (job.route is None, sum(waypoint["jumps"] for waypoint in job.route or [])))
+        for row, job in enumerate(results):
+            params = job.params
+            text = f"{params['efficiency']}%, {params['range']:g} Ly: "
+            if job.route:
+                text += f"{sum(waypoint['jumps'] for waypoint in job.route)} jumps"
+            else:
+                text += job.error or ("timed out" if job.timed_out else "failed")
+            label = tk.Label(self.sweep_frame, text=text, justify=LEFT)
+            label.grid(row=row, column=0, sticky=tk.W)
+            button = tk.Button(self.sweep_frame, text="Use", command=lambda job=job: self.adopt_plotted_route(job.route),
+                               state=tk.NORMAL if job.route else tk.DISABLED)
+            button.grid(row=row, column=1, padx=5, sticky=tk.E)
+            self.sweep_rows.append((label, button))
+
+        self.view.render({self.sweep_frame: (len(self.sweep_rows) > 0, {})})
+
+    def clear_sweep(self):
+        if len(self.sweep_done) < len(self.sweep_jobs):
+            # The plot form was disabled until the sweep finished, which it now never will
+            self.enable_plot_gui(True)
+        for job in self.sweep_jobs:
+            job.cancel()
+        self.sweep_jobs = []
+        self.sweep_done = []
+        if self.sweep_rows:
+            self.show_sweep_results()
+        self.show_progress()
+
+    def read_edts(self, filename):
+        with open(filename, 'r') as txtfile:
+            for row in txtfile:
+                if row not in (None, "", []):
+                    if row.lstrip().startswith('==='):
+                        jumps = int(re.findall("\d+ jump", row)[0].rstrip(' jumps'))
+
+                        system = row[row.find('>') + 1:]
+                        if ',' in system:
+                            systems = system.split(',')
+                            for system in systems:
+                                yield Waypoint(system.strip(), jumps)
+                                jumps = 1
+                        else:
+                            yield Waypoint(system.strip(), jumps)
 
     def export_route(self):
         if self.route.__len__() == 0:
             logger.info("No route to export")
             return
 
-        route_start = self.route[0][0]
-        route_end = self.route[-1][0]
+        route_start = self.route[0].system
+        route_end = self.route[-1].system
         route_name = f"{route_start} to {route_end}"
         #logger.info(f"Route name: {route_name}")
 
         ftypes = [('TCE Flight Plan files', '*.exp')]
+        import tkinter.filedialog as filedialog
         filename = filedialog.asksaveasfilename(filetypes = ftypes, initialdir=os.path.expanduser('~'), initialfile=f"{route_name}.exp")
 
         if filename.__len__() > 0:
             try:
                 with open(filename, 'w') as csvfile:
-                    for row in self.route:
-                        csvfile.write(f"{route_name},{row[0]}\n")
+                    for waypoint in self.route:
+                        csvfile.write(f"{route_name},{waypoint.system}\n")
             except:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
                 lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
@@ -693,25 +894,29 @@ class SpanshRouter():
                 self.show_error("An error occured while writing the file.")
 
     def clear_route(self, show_dialog=True):
-        clear = confirmDialog.askyesno("SpanshRouter","Are you sure you want to clear the current route?") if show_dialog else True
+        clear = True
+        if show_dialog:
+            import tkinter.messagebox as confirmDialog
+            clear = confirmDialog.askyesno("SpanshRouter","Are you sure you want to clear the current route?")
 
         if clear:
             self.offset = 0
-            self.route = []
+            self.route = Route()
+            self.rejoin = None
+            self.importing = None
+            if self.restoring is not None:
+                self.restoring.cancel()
+                self.restoring = None
             self.next_waypoint = ""
-            self.jumps_left = 0
-            self.roadtoriches = False
-            self.fleetcarrier = False
-            self.galaxy = False
-            try:
-                os.remove(self.save_route_path)
-            except:
-                logger.info("No route to delete")
             try:
-                os.remove(self.offset_file_path)
+                self.route_store.clear()
             except:
-                logger.info("No offset file to delete")
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+                logger.warning(''.join('!! ' + line for line in lines))
+            self.saved_route = None
 
+            self.show_progress()
             self.update_gui()
 
     def save_all_route(self):
@@ -719,51 +924,21 @@ class SpanshRouter():
         self.save_offset()
 
     def save_route(self):
-        if self.route.__len__() != 0:
-            with open(self.save_route_path, 'w', newline='') as csvfile:
-                if self.roadtoriches:
-                    # Write output: System, Jumps, Bodies[], BodySubTypes[]
-                    fieldnames = [self.system_header, self.jumps_header, self.bodyname_header, self.bodysubtype_header]
-                    writer = csv.writer(csvfile)
-                    writer.writerow(fieldnames)
-                    for row in self.route:
-                        writer.writerow(row)
-
-                if self.fleetcarrier:
-                    # Write output: System, Jumps, 
-                    fieldnames = [self.system_header, self.jumps_header, self.restocktritium_header]
-                    writer = csv.writer(csvfile)
-                    writer.writerow(fieldnames)
-                    for row in self.route:
-                        writer.writerow(row)
+        # The whole route is only written when it changed, progress goes through save_offset
+        if self.saved_route is self.route:
+            return
 
-                if self.galaxy:
-                    # Write output: System, Refuel
-                    fieldnames = [self.system_header, self.refuel_header]
-                    writer = csv.writer(csvfile)
-                    writer.writerow(fieldnames)
-                    writer.writerows(self.route)
-                else:
-                    # Write output: System, Jumps
-                    fieldnames = [self.system_header, self.jumps_header]
-                    writer = csv.writer(csvfile)
-                    writer.writerow(fieldnames)
-                    writer.writerows(self.route)
-        else:
-            try:
-                os.remove(self.save_route_path)
-            except:
-                logger.info("No route to delete")
+        with metrics.timer("route.save"):
+            if self.route.__len__() != 0:
+                self.route_store.save_route(self.route, self.offset)
+            else:
+                self.route_store.clear()
+        self.saved_route = self.route
 
     def save_offset(self):
         if self.route.__len__() != 0:
-            with open(self.offset_file_path, 'w') as offset_fh:
-                offset_fh.write(str(self.offset))
-        else:
-            try:
-                os.remove(self.offset_file_path)
-            except:
-                logger.info("No offset to delete")
+            with metrics.timer("route.save_offset"):
+                self.route_store.save_offset(self.offset)
 
     def update_bodies_text(self):
         if not self.roadtoriches: return
@@ -773,44 +948,14 @@ class SpanshRouter():
         if lastsystemoffset < 0:
             lastsystemoffset = 0 # Display bodies of the first system
 
-        lastsystem = self.route[lastsystemoffset][0]
-        bodynames = self.route[lastsystemoffset][2]
-        bodysubtypes = self.route[lastsystemoffset][3]
-     
-        waterbodies = []
-        rockybodies = []
-        metalbodies = []
-        earthlikebodies = []
-        unknownbodies = []
-
-        for num, name in enumerate(bodysubtypes):
-            shortbodyname = bodynames[num].replace(lastsystem + " ", "")
-            if name.lower() == "high metal content world":
-                metalbodies.append(shortbodyname)
-            elif name.lower() == "rocky body": 
-                rockybodies.append(shortbodyname)
-            elif name.lower() == "earth-like world":
-                earthlikebodies.append(shortbodyname)
-            elif name.lower() == "water world": 
-                waterbodies.append(shortbodyname)
-            else:
-                unknownbodies.append(shortbodyname)
-
-        bodysubtypeandname = ""
-        if len(metalbodies) > 0: bodysubtypeandname += f"\n   Metal: " + ', '.join(metalbodies)
-        if len(rockybodies) > 0: bodysubtypeandname += f"\n   Rocky: " + ', '.join(rockybodies)
-        if len(earthlikebodies) > 0: bodysubtypeandname += f"\n   Earth: " + ', '.join(earthlikebodies)
-        if len(waterbodies) > 0: bodysubtypeandname += f"\n   Water: " + ', '.join(waterbodies)
-        if len(unknownbodies) > 0: bodysubtypeandname += f"\n   Unknown: " + ', '.join(unknownbodies)
-
-        self.bodies = f"\n{lastsystem}:{bodysubtypeandname}"
-
+        self.bodies = self.route.bodies_text(lastsystemoffset) or ""
 
     def check_range(self, name, index, mode):
         value = self.range_entry.var.get()
         if value.__len__() > 0 and value != self.range_entry.placeholder:
             try:
-                float(value)
+                # Several ranges, separated by commas, can be swept at once
+                parse_values(value, float)
                 self.range_entry.set_error_style(False)
                 self.hide_error()
             except ValueError:
@@ -832,23 +977,43 @@ class SpanshRouter():
                 lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
                 logger.warning(''.join('!! ' + line for line in lines))
 
-    def check_for_update(self):
-        return  # Autoupdates is disabled
+    def check_for_update(self, callback):
+        # Off unless turned on through EDMC's config, as this fork doesn't publish releases
+        if not config.get_int('SpanshRouter_autoupdate'):
+            return
+        threading.Thread(target=self.fetch_update, name="SpanshRouter-update", daemon=True).start()
+        self.frame.after(500, self.poll_update, callback)
+
+    def fetch_update(self):
+        # Runs on its own thread, the result only reaches the Tk thread through update_results
+        updater = None
         self.cleanup_old_version()
         version_url = "https://raw.githubusercontent.com/CMDR-Kiel42/EDMC_SpanshRouter/master/version.json"
         try:
-            response = requests.get(version_url, timeout=2)
-            if response.status_code == 200:
-                if self.plugin_version != response.text:
-                    self.update_available = True
-                    self.spansh_updater = SpanshUpdater(response.text, self.plugin_dir)
-
-            else:
-                logger.warning(f"Could not query latest SpanshRouter version, code: {str(response.status_code)}; text: {response.text}")
+            version = self.update_cache.get("version", version_url)
+            if version is not None and self.plugin_version != version:
+                updater = SpanshUpdater(version, self.plugin_dir, self.update_cache)
+            self.update_cache.save()
         except:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
             logger.warning(''.join('!! ' + line for line in lines))
+        self.update_results.put(updater)
+
+    def poll_update(self, callback):
+        try:
+            updater = self.update_results.get_nowait()
+        except queue.Empty:
+            self.frame.after(500, self.poll_update, callback)
+            return
+
+        if updater is not None:
+            self.spansh_updater = updater
+            self.update_available = True
+            callback()
+
+    def prepare_update(self):
+        self.spansh_updater.prepare()
 
     def install_update(self):
         self.spansh_updater.install()
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from time import time
+
+from config import appname
+
+# We need a name of plugin dir, not SystemsCache.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+
+def normalize_query(query):
+    return " ".join(query.split()).casefold()
+
+
+class SystemsCache():
+    # Spansh never returns more suggestions than that, a shorter answer holds every match for the query
+    page_size = 10
+    # Don't narrow on prefixes too short to be queried in the first place
+    min_query_length = 3
+
+    def __init__(self, path, max_entries=1000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (timestamp, complete, results), least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+
+    def get(self, query):
+        key = normalize_query(query)
+        now = time()
+        with self.lock:
+            self.load()
+            entry = self.lookup(key, now)
+            if entry is not None:
+                return entry[2]
+
+            # A complete answer for a shorter prefix holds every match for this query too
+            for end in range(len(key) - 1, self.min_query_length - 1, -1):
+                entry = self.lookup(key[:end], now)
+                if entry is not None and entry[1]:
+                    results = [name for name in entry[2] if name.casefold().startswith(key)]
+                    self.store(key, (entry[0], True, results))
+                    return results
+
+        return None
+
+    def put(self, query, results):
+        with self.lock:
+            self.load()
+            self.store(normalize_query(query), (time(), len(results) < self.page_size, results))
+
+    def lookup(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl:
+            del self.entries[key]
+            self.dirty = True
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def load(self):
+        # Deferred until the first lookup so EDMC startup doesn't pay for it
+        if self.loaded:
+            return
+        self.loaded = True
+        try:
+            with open(self.path, 'r') as cache_fh:
+                saved = json.load(cache_fh)
+            now = time()
+            for key, timestamp, complete, results in saved["entries"]:
+                if now - timestamp <= self.ttl:
+                    self.entries[key] = (timestamp, complete, results)
+        except IOError:
+            pass
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            entries = [[key, *entry] for key, entry in self.entries.items()]
+            self.dirty = False
+
+        try:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w') as cache_fh:
+                json.dump({"entries": entries}, cache_fh)
+            os.replace(tmp_path, self.path)
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
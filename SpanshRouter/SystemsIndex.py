@@ -0,0 +1,235 @@
+import csv
+import gzip
+import heapq
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import traceback
+from array import array
+
+from config import appname
+
+# We need a name of plugin dir, not SystemsIndex.py dir
+plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
+logger = logging.getLogger(f'{appname}.{plugin_name}')
+
+# File layout: header, (count + 1) little-endian offsets, then the names sorted
+# case-insensitively, one per line. Name i spans offsets[i] to offsets[i + 1] - 1.
+MAGIC = b'SRSYSIX1'
+HEADER = struct.Struct('<8sQB7x')
+OFFSET_FORMATS = {4: struct.Struct('<I'), 8: struct.Struct('<Q')}
+
+# Names accepted in a dump file dropped in the plugin folder, in order of preference
+DUMP_NAMES = ["systems.json.gz", "systems.json", "systems.csv.gz", "systems.csv", "systems.txt.gz", "systems.txt"]
+
+
+def sort_key(name):
+    return name.casefold()
+
+
+def read_dump(path):
+    compressed = path.endswith(".gz")
+    opener = gzip.open if compressed else io.open
+    with opener(path, 'rt', encoding='utf-8', newline='') as dump:
+        if (path[:-3] if compressed else path).endswith(".csv"):
+            reader = csv.DictReader(dump)
+            column = "System Name" if "System Name" in reader.fieldnames else "name"
+            for row in reader:
+                if row[column]:
+                    yield row[column]
+            return
+
+        for line in dump:
+            line = line.strip()
+            if line in ("", "[", "]"):
+                continue
+            if line.startswith("{"):
+                # Spansh and EDSM dumps hold one system object per line inside a big array
+                name = json.loads(line.rstrip(",")).get("name")
+                if name:
+                    yield name
+            else:
+                yield line
+
+
+def write_run(names):
+    names.sort(key=sort_key)
+    run = tempfile.TemporaryFile('w+', encoding='utf-8')
+    run.writelines(name + "\n" for name in names)
+    run.seek(0)
+    return run
+
+
+def build_index(dump_path, index_path, run_size=1000000):
+    # External merge sort so even the full galaxy never has to fit in memory
+    runs = []
+    names = []
+    for name in read_dump(dump_path):
+        names.append(name)
+        if len(names) >= run_size:
+            runs.append(write_run(names))
+            names = []
+    if names:
+        runs.append(write_run(names))
+
+    tmp_path = index_path + ".tmp"
+    count = 0
+    with tempfile.TemporaryFile() as offsets_fh, tempfile.TemporaryFile() as blob_fh:
+        offsets = array('Q')
+        position = 0
+        previous = None
+        for line in heapq.merge(*runs, key=lambda line: sort_key(line[:-1])):
+            if line == previous:
+                continue
+            previous = line
+            offsets.append(position)
+            encoded = line.encode('utf-8')
+            blob_fh.write(encoded)
+            position += len(encoded)
+            count += 1
+            if len(offsets) >= 65536:
+                offsets.tofile(offsets_fh)
+                offsets = array('Q')
+        offsets.append(position)
+        offsets.tofile(offsets_fh)
+
+        for run in runs:
+            run.close()
+
+        width = 4 if position < 2 ** 32 else 8
+        base = HEADER.size + (count + 1) * width
+        with open(tmp_path, 'wb') as index_fh:
+            index_fh.write(HEADER.pack(MAGIC, count, width))
+            offsets_fh.seek(0)
+            while True:
+                chunk = array('Q')
+                try:
+                    chunk.fromfile(offsets_fh, 65536)
+                except EOFError:
+                    pass
+                if not chunk:
+                    break
+                chunk = array('I' if width == 4 else 'Q', (base + offset for offset in chunk))
+                if sys.byteorder != 'little':
+                    chunk.byteswap()
+                chunk.tofile(index_fh)
+            blob_fh.seek(0)
+            while True:
+                data = blob_fh.read(1 << 20)
+                if not data:
+                    break
+                index_fh.write(data)
+
+    os.replace(tmp_path, index_path)
+    logger.info(f"Built offline systems index with {count} systems")
+    return count
+
+
+class SystemsIndex():
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.mapped = False
+        self.mm = None
+        self.count = 0
+        self.offset_format = None
+        self.building = False
+
+    def map(self):
+        # Mapping is deferred to the first lookup, and costs the same whatever the index size
+        self.mapped = True
+        try:
+            with open(self.path, 'rb') as index_fh:
+                mm = mmap.mmap(index_fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, ValueError):
+            return
+
+        magic, count, width = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or width not in OFFSET_FORMATS:
+            logger.warning(f"Ignoring invalid offline systems index {self.path}")
+            mm.close()
+            return
+
+        self.mm = mm
+        self.count = count
+        self.offset_format = OFFSET_FORMATS[width]
+
+    def unmap(self):
+        if self.mm is not None:
+            self.mm.close()
+        self.mm = None
+        self.count = 0
+        self.mapped = False
+
+    def offset(self, i):
+        return self.offset_format.unpack_from(self.mm, HEADER.size + i * self.offset_format.size)[0]
+
+    def name(self, i):
+        return self.mm[self.offset(i):self.offset(i + 1) - 1].decode('utf-8')
+
+    def lookup(self, query, limit=10):
+        key = sort_key(query.strip())
+        with self.lock:
+            if self.building:
+                return []
+            if not self.mapped:
+                self.map()
+            if self.mm is None or not key:
+                return []
+
+            lo, hi = 0, self.count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if sort_key(self.name(mid)) < key:
+                    lo = mid + 1
+                else:
+                    hi = mid
+
+            results = []
+            while lo < self.count and len(results) < limit:
+                name = self.name(lo)
+                if not sort_key(name).startswith(key):
+                    break
+                results.append(name)
+                lo += 1
+            return results
+
+    def find_dump(self):
+        folder = os.path.dirname(self.path)
+        for dump_name in DUMP_NAMES:
+            dump_path = os.path.join(folder, dump_name)
+            if os.path.exists(dump_path):
+                return dump_path
+        return None
+
+    def update_from_dump(self):
+        dump_path = self.find_dump()
+        if dump_path is None or self.building:
+            return
+        if os.path.exists(self.path) and os.path.getmtime(self.path) >= os.path.getmtime(dump_path):
+            return
+
+        self.building = True
+        threading.Thread(target=self.build, args=[dump_path], name="SpanshRouter-index", daemon=True).start()
+
+    def build(self, dump_path):
+        try:
+            logger.info(f"Building offline systems index from {dump_path}")
+            with self.lock:
+                # Windows can't replace a file that is still mapped
+                self.unmap()
+            build_index(dump_path, self.path)
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+        finally:
+            with self.lock:
+                self.unmap()
+            self.building = False
@@ -0,0 +1,45 @@
+from time import perf_counter
+
+
+class ViewState():
+    # Remembers what was last applied to each widget, so a render only
+    # touches the widgets whose visibility or options actually changed
+    def __init__(self):
+        # widget -> (visible, {option: value})
+        self.applied = {}
+        self.renders = 0
+        self.changes = 0
+        self.render_time = 0.0
+
+    def render(self, view):
+        # view maps widgets to (visible, {option: value}), visible None leaves it as it is.
+        # Tk lays the frame out once, on its next idle pass, whatever we change here
+        start = perf_counter()
+        for widget, (visible, options) in view.items():
+            applied_visible, applied_options = self.applied.get(widget, (None, {}))
+
+            if visible is not None and visible != applied_visible:
+                if visible:
+                    widget.grid()
+                else:
+                    widget.grid_remove()
+                applied_visible = visible
+                self.changes += 1
+
+            changed = {option: value for option, value in options.items() if applied_options.get(option) != value}
+            if changed:
+                widget.config(**changed)
+                applied_options = {**applied_options, **changed}
+                self.changes += 1
+
+            self.applied[widget] = (applied_visible, applied_options)
+
+        self.renders += 1
+        self.render_time += perf_counter() - start
+
+    def stats(self):
+        return {
+            "renders": self.renders,
+            "changes": self.changes,
+            "render_time": self.render_time,
+        }
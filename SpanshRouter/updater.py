@@ -1,71 +1,160 @@
+import hashlib
 import json
 import logging
 import os
+import shutil
 import sys
+import threading
 import traceback
-import zipfile
-
-import requests
 
 from config import appname
 
+from .HttpClient import http_client
+from .Metrics import metrics
+
 # We need a name of plugin dir, not SpanshRouter.py dir
 plugin_name = os.path.basename(os.path.dirname(os.path.dirname(__file__)))
 logger = logging.getLogger(f'{appname}.{plugin_name}')
 
 
 class SpanshUpdater():
-    def __init__(self, version, plugin_dir):
+    chunk_size = 64 * 1024
+
+    def __init__(self, version, plugin_dir, cache=None):
         self.version = version
+        self.cache = cache
         self.zip_name = "EDMC_SpanshRouter_" + version.replace('.', '') + ".zip"
         self.plugin_dir = plugin_dir
         self.zip_path = os.path.join(self.plugin_dir, self.zip_name)
+        # Downloads go there first, and pick up where they stopped if EDMC was closed meanwhile
+        self.part_path = self.zip_path + ".part"
+        # The new files wait there until plugin_stop swaps them in
+        self.staging_dir = os.path.join(self.plugin_dir, ".update")
         self.zip_downloaded = False
+        self.staged = False
+        # "sha256:<hex>" of the release zip, when GitHub lists one for the asset
+        self.digest = None
         self.changelogs = self.get_changelog()
 
+    def prepare(self):
+        # Download, check and extract in the background, long before EDMC shuts down
+        threading.Thread(target=self.stage, name="SpanshRouter-download", daemon=True).start()
+
+    def stage(self):
+        with metrics.timer("update.stage"):
+            staged = self.download_zip() and self.verify_zip() and self.extract_zip()
+        if staged:
+            self.staged = True
+            logger.info(f"SpanshRouter {self.version} is ready to be installed")
+
     def download_zip(self):
         url = 'https://github.com/CMDR-Kiel42/EDMC_SpanshRouter/releases/download/v' + self.version + '/' + self.zip_name
 
         try:
-            r = requests.get(url)
-            if r.status_code == 200:
-                with open(self.zip_path, 'wb') as f:
-                    logger.info(f"Downloading SpanshRouter to {self.zip_path}")
-                    f.write(os.path.join(r.content))
-                self.zip_downloaded = True
+            headers = {}
+            downloaded = os.path.getsize(self.part_path) if os.path.exists(self.part_path) else 0
+            if downloaded > 0:
+                headers["Range"] = f"bytes={downloaded}-"
+
+            with http_client.get("download", url, headers=headers, stream=True) as r:
+                if r.status_code in (200, 206):
+                    # The server may ignore the range and send the whole file again
+                    mode = 'ab' if r.status_code == 206 else 'wb'
+                    if mode == 'ab':
+                        metrics.count("update.resumed")
+                    logger.info(f"Downloading SpanshRouter to {self.zip_path}" + (f" from byte {downloaded}" if mode == 'ab' else ""))
+                    with open(self.part_path, mode) as f, metrics.timer("update.download"):
+                        for chunk in r.iter_content(self.chunk_size):
+                            f.write(chunk)
+                            metrics.count("update.downloaded_bytes", len(chunk))
+                elif r.status_code != 416:
+                    # 416 means the part file already holds everything
+                    logger.warning("Failed to fetch SpanchRouter update. Status code: " + str(r.status_code))
+                    return False
+
+            os.replace(self.part_path, self.zip_path)
+            self.zip_downloaded = True
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            self.zip_downloaded = False
+        return self.zip_downloaded
+
+    def verify_zip(self):
+        try:
+            if self.digest and self.digest.startswith("sha256:"):
+                sha256 = hashlib.sha256()
+                with open(self.zip_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                        sha256.update(chunk)
+                valid = sha256.hexdigest() == self.digest[len("sha256:"):]
             else:
-                logger.warning("Failed to fetch SpanchRouter update. Status code: " + str(r.status_code))
-                self.zip_downloaded = False
+                # No published checksum, fall back on the CRC of every member
+                import zipfile
+                with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+                    valid = zip_ref.testzip() is None
         except:
             exc_type, exc_value, exc_traceback = sys.exc_info()
             lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
             logger.warning(''.join('!! ' + line for line in lines))
+            valid = False
+
+        if not valid:
+            logger.warning(f"The downloaded SpanshRouter update is corrupted, removing {self.zip_path}")
+            os.remove(self.zip_path)
             self.zip_downloaded = False
-        finally:
-            return self.zip_downloaded
+        return valid
+
+    def extract_zip(self):
+        try:
+            import zipfile
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
+                zip_ref.extractall(self.staging_dir)
+            os.remove(self.zip_path)
+            return True
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
+            return False
 
     def install(self):
-        if self.download_zip():
-            try:
-                with zipfile.ZipFile(self.zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(self.plugin_dir)
+        # Called from plugin_stop, so it only moves files that are already on disk
+        if not self.staged:
+            logger.warning("The SpanshRouter update isn't downloaded yet, it will be offered again next time")
+            return
 
-                os.remove(self.zip_path)
-            except:
-                exc_type, exc_value, exc_traceback = sys.exc_info()
-                lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
-                logger.warning(''.join('!! ' + line for line in lines))
-        else:
-            logger.warning("Error when downloading the latest SpanshRouter update")
+        try:
+            for root, dirs, files in os.walk(self.staging_dir):
+                target_dir = os.path.join(self.plugin_dir, os.path.relpath(root, self.staging_dir))
+                os.makedirs(target_dir, exist_ok=True)
+                for filename in files:
+                    os.replace(os.path.join(root, filename), os.path.join(target_dir, filename))
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+        except:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
+            logger.warning(''.join('!! ' + line for line in lines))
 
     def get_changelog(self):
         url = "https://api.github.com/repos/CMDR-Kiel42/EDMC_SpanshRouter/releases/latest"
         try:
-            r = requests.get(url, timeout=2)
-            
-            if r.status_code == 200:
+            if self.cache is not None:
+                release = self.cache.get("changelog", url)
+            else:
+                r = http_client.get("changelog", url)
+                release = r.text if r.status_code == 200 else None
+
+            if release is not None:
+                release = json.loads(release)
+                for asset in release.get("assets", []):
+                    if asset.get("name") == self.zip_name:
+                        self.digest = asset.get("digest")
+
                 # Get the changelog and replace all breaklines with simple ones
-                changelogs = json.loads(r.content)["body"]
+                changelogs = release["body"]
                 changelogs = "\n".join(changelogs.splitlines())
                 return changelogs
 
@@ -73,3 +162,4 @@ class SpanshUpdater():
             exc_type, exc_value, exc_traceback = sys.exc_info()
             lines = traceback.format_exception(exc_type, exc_value, exc_traceback)
             logger.warning(''.join('!! ' + line for line in lines))
+        return ""
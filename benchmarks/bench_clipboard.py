@@ -0,0 +1,55 @@
+# Compares the clipboard backends for copying a new waypoint, and for
+# re-copying one the clipboard already holds.
+import os
+import shutil
+import subprocess
+import sys
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+
+from SpanshRouter.Clipboard import CommandClipboard, TkClipboard
+
+ROUNDS = 200
+
+
+def legacy_copy(text):
+    # What copy_waypoint did before: two forks per waypoint, never reaped
+    command = subprocess.Popen(["echo", "-n", text], stdout=subprocess.PIPE)
+    subprocess.Popen(["xclip", "-selection", "c"], stdin=command.stdout)
+
+
+def bench(name, copy):
+    start = perf_counter()
+    for i in range(ROUNDS):
+        copy(f"Waypoint {i}")
+    changed = (perf_counter() - start) / ROUNDS
+
+    start = perf_counter()
+    for i in range(ROUNDS):
+        copy("Waypoint")
+    same = (perf_counter() - start) / ROUNDS
+    print(f"{name:<16} new waypoint {changed * 1e6:10.1f} us   same waypoint {same * 1e6:10.1f} us")
+
+
+def main():
+    if sys.platform.startswith("linux") and shutil.which("xclip"):
+        bench("echo | xclip", legacy_copy)
+        clipboard = CommandClipboard("xclip")
+        bench("xclip", clipboard.copy)
+    else:
+        print("xclip not available, skipping the command backends")
+
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+        clipboard = TkClipboard(root)
+        bench("tk", clipboard.copy)
+        root.destroy()
+    else:
+        print("No display, skipping the Tk backend")
+
+
+if __name__ == '__main__':
+    main()
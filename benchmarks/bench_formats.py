@@ -0,0 +1,62 @@
+# Parse throughput of every registered import format, on synthetic files.
+import csv
+import io
+import sys
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+
+from SpanshRouter.RouteFormats import formats, read_route
+
+ROWS = 100000
+
+SAMPLE_VALUES = {
+    "System Name": lambda i: f"Synuefe AA-A h{i}",
+    "Jumps": lambda i: "3",
+    "Body Name": lambda i: f"Synuefe AA-A h{i} A 1",
+    "Body Subtype": lambda i: "High metal content world",
+    "Estimated Scan Value": lambda i: "31000",
+    "Estimated Mapping Value": lambda i: "480000",
+    "Scan Value": lambda i: "511000",
+    "Distance Remaining": lambda i: f"{(ROWS - i) * 250.0:.2f}",
+    "Fuel Used": lambda i: "3.5",
+    "Restock Tritium": lambda i: "Yes" if i % 10 == 0 else "No",
+    "Refuel": lambda i: "Yes" if i % 5 == 0 else "No",
+}
+# Saved road to riches routes hold list representations
+SAVED_LIST_VALUES = {
+    "Body Name": lambda i: repr([f"Synuefe AA-A h{i} A 1", f"Synuefe AA-A h{i} A 2"]),
+    "Body Subtype": lambda i: repr(["High metal content world", "Water world"]),
+}
+
+
+def synthetic_file(route_format, rows):
+    fieldnames = sorted(route_format.required) + list(route_format.optional)
+    values = dict(SAMPLE_VALUES)
+    if "saved" in route_format.name and route_format.kind == "riches":
+        values.update(SAVED_LIST_VALUES)
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(fieldnames)
+    for i in range(rows):
+        # Columns without a sample are left empty, as optional columns often are
+        writer.writerow([values.get(name, lambda i: "")(i) for name in fieldnames])
+    output.seek(0)
+    return output
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    for route_format in formats:
+        csvfile = synthetic_file(route_format, rows)
+        start = perf_counter()
+        detected, waypoints = read_route(csvfile)
+        count = sum(1 for _ in waypoints)
+        elapsed = perf_counter() - start
+        assert detected is route_format, f"{route_format.name} detected as {detected.name}"
+        print(f"{route_format.name:<24} {count:>8} waypoints  {rows / elapsed:>12,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
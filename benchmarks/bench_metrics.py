@@ -0,0 +1,36 @@
+# Cost of a timed block and of a counter, with metrics off and on.
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+
+from SpanshRouter.Metrics import Metrics
+
+ROUNDS = 1000000
+
+
+def bench(metrics):
+    start = perf_counter()
+    for i in range(ROUNDS):
+        with metrics.timer("bench.timer"):
+            pass
+    timer = (perf_counter() - start) / ROUNDS
+
+    start = perf_counter()
+    for i in range(ROUNDS):
+        metrics.count("bench.counter")
+    counter = (perf_counter() - start) / ROUNDS
+    return timer, counter
+
+
+def main():
+    disabled = Metrics()
+    enabled = Metrics()
+    # Enabled without the snapshot thread
+    enabled.enabled = True
+    for name, metrics in (("disabled", disabled), ("enabled", enabled)):
+        timer, counter = bench(metrics)
+        print(f"{name:<9} timer {timer * 1e9:7.0f} ns  counter {counter * 1e9:7.0f} ns")
+
+
+if __name__ == '__main__':
+    main()
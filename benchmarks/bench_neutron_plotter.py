@@ -0,0 +1,84 @@
+# Local neutron plotter against synthetic catalogs: catalog load, tree build and
+# plot time by catalog size. Every plotted leg is checked against the jump range.
+#
+#   python bench_neutron_plotter.py [sizes...]
+import math
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+import synthetic
+
+from SpanshRouter.NeutronPlotter import BOOSTS, NeutronPlotter, StarCatalog
+
+SIZES = [10000, 100000, 1000000]
+RANGE = 50.0
+EFFICIENCIES = [20, 60, 100]
+PLOTS = 3
+
+
+def check(plotter, rows, range_ly):
+    catalog = plotter.catalog
+    jumps = 0
+    for (start, _), (end, leg_jumps) in zip(rows, rows[1:]):
+        distance = math.dist(catalog.coords[start], catalog.coords[end])
+        boost = BOOSTS[int(catalog.types[start])]
+        # One boosted jump, then normal ones
+        assert distance <= range_ly * (boost + leg_jumps - 1) + 1e-6, (start, end, distance, leg_jumps)
+        jumps += leg_jumps
+    return jumps
+
+
+def bench(size, folder):
+    path = os.path.join(folder, f"catalog_{size}.csv")
+    synthetic.write_catalog(path, size)
+
+    start = perf_counter()
+    catalog = StarCatalog.load(path)
+    csv_load = perf_counter() - start
+    npz_path = os.path.join(folder, f"catalog_{size}.npz")
+    catalog.save(npz_path)
+    start = perf_counter()
+    catalog = StarCatalog.load(npz_path)
+    npz_load = perf_counter() - start
+
+    start = perf_counter()
+    plotter = NeutronPlotter(catalog)
+    build = perf_counter() - start
+
+    # Pairs of stars far apart, from corner to corner of the slab
+    coords = catalog.coords
+    corners = [(coords[:, 0] + coords[:, 2], -(coords[:, 0] + coords[:, 2])),
+               (coords[:, 0] - coords[:, 2], coords[:, 2] - coords[:, 0])]
+    pairs = [(int(a.argmin()), int(b.argmin())) for a, b in corners]
+    pairs.append((int(coords[:, 0].argmin()), int(coords[:, 0].argmax())))
+
+    print(f"{size:>8} stars  {len(plotter.boosters):>6} boosters  csv {csv_load:6.2f}s  "
+          f"npz {npz_load:6.3f}s  tree {build:6.3f}s")
+    for efficiency in EFFICIENCIES:
+        times = []
+        total = direct = 0
+        for source, destination in pairs[:PLOTS]:
+            start = perf_counter()
+            rows = plotter.plot(source, destination, RANGE, efficiency)
+            times.append(perf_counter() - start)
+            jumps = check(plotter, rows, RANGE)
+            total += jumps
+            direct += math.ceil(math.dist(coords[source], coords[destination]) / RANGE)
+            system_jumps = plotter.system_jumps(rows)
+            assert system_jumps[0]["jumps"] == 0 and sum(row["jumps"] for row in system_jumps) == jumps
+        print(f"         efficiency {efficiency:>3}%  plot {sum(times) / len(times) * 1000:8.1f} ms  "
+              f"{total} jumps in all ({direct} without boosts)")
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    with tempfile.TemporaryDirectory() as folder:
+        for size in sizes:
+            bench(size, folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Finding the closest waypoint ahead after a detour, through the route's k-d tree
+# and by scanning every remaining waypoint, by route size.
+import math
+import random
+import sys
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+import synthetic
+
+from SpanshRouter.Route import Route, Waypoint
+
+SIZES = [1000, 10000, 100000]
+QUERIES = 1000
+
+
+def make_route(count):
+    # A wandering line of waypoints about 50 ly apart
+    rng = random.Random(count)
+    route = Route()
+    x = y = z = 0.0
+    for i in range(count):
+        x, y, z = x + rng.uniform(0, 50), y + rng.uniform(-10, 10), z + rng.uniform(-20, 20)
+        route.append(Waypoint(synthetic.system_name(i), 1, coords=(x, y, z)))
+    return route
+
+
+def scan(route, coords, start):
+    best = None
+    for position in range(start, len(route)):
+        distance = math.dist(coords, route.coords_at(position))
+        if best is None or distance < best[1]:
+            best = (position, distance)
+    return best
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or SIZES
+    for size in sizes:
+        route = make_route(size)
+        rng = random.Random(1)
+        queries = []
+        for i in range(QUERIES):
+            start = rng.randrange(size)
+            x, y, z = route.coords_at(min(start + rng.randrange(20), size - 1))
+            queries.append(((x + rng.uniform(-30, 30), y + rng.uniform(-30, 30), z + rng.uniform(-30, 30)), start))
+
+        begin = perf_counter()
+        route.build_tree()
+        build = perf_counter() - begin
+
+        begin = perf_counter()
+        found = [route.nearest(coords, start) for coords, start in queries]
+        tree = (perf_counter() - begin) / QUERIES
+
+        checked = queries[:max(10, QUERIES * 1000 // size)]
+        begin = perf_counter()
+        expected = [scan(route, coords, start) for coords, start in checked]
+        linear = (perf_counter() - begin) / len(checked)
+        assert [position for position, distance in found[:len(checked)]] == [position for position, distance in expected]
+
+        print(f"{size:>7} waypoints  build {build * 1000:7.1f} ms  nearest {tree * 1e6:7.1f} us  "
+              f"scan {linear * 1e6:9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
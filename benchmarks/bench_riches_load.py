@@ -0,0 +1,83 @@
+# Load time of a saved road to riches route: the old route.csv with
+# ast.literal_eval, the same file through the fast list decoder, and route.db.
+import ast
+import csv
+import io
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+import edmc_stubs  # noqa: F401
+
+from SpanshRouter.Route import Route, Waypoint
+from SpanshRouter.RouteFormats import read_route
+from SpanshRouter.RouteStore import RouteStore
+
+SYSTEMS = 50000
+SUBTYPES = ["High metal content world", "Rocky body", "Water world", "Earth-like world"]
+
+
+def synthetic_route(count):
+    route = Route("riches")
+    for i in range(count):
+        bodies = tuple(f"Synuefe AA-A h{i} {chr(65 + b)} {b + 1}" for b in range(3))
+        route.append(Waypoint(f"Synuefe AA-A h{i}", 1, bodies, tuple(SUBTYPES[(i + b) % 4] for b in range(3)),
+                              scan_value=1000000))
+    return route
+
+
+def write_legacy_csv(route, path):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["System Name", "Jumps", "Body Name", "Body Subtype"])
+        for waypoint in route:
+            writer.writerow([waypoint.system, waypoint.jumps, list(waypoint.body_names), list(waypoint.body_subtypes)])
+
+
+def load_legacy_ast(path):
+    route = Route("riches")
+    with io.open(path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        for row in csv.DictReader(csvfile):
+            route.append(Waypoint(row["System Name"], int(row["Jumps"]), tuple(ast.literal_eval(row["Body Name"])),
+                                  tuple(ast.literal_eval(row["Body Subtype"]))))
+    return route
+
+
+def load_legacy_fast(path):
+    route = Route("riches")
+    with io.open(path, 'r', encoding='utf-8-sig', newline='') as csvfile:
+        route_format, rows = read_route(csvfile)
+        for waypoint in rows:
+            route.append(waypoint)
+    return route
+
+
+def timed(name, load, *args):
+    start = perf_counter()
+    route = load(*args)
+    elapsed = perf_counter() - start
+    print(f"{name:<28} {elapsed * 1000:9.1f} ms  {len(route) / elapsed:>12,.0f} systems/s")
+    return route
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SYSTEMS
+    route = synthetic_route(count)
+    with tempfile.TemporaryDirectory() as folder:
+        csv_path = os.path.join(folder, "route.csv")
+        write_legacy_csv(route, csv_path)
+        store = RouteStore(os.path.join(folder, "route.db"))
+        store.save_route(route, 0)
+
+        reference = timed("route.csv, ast.literal_eval", load_legacy_ast, csv_path)
+        fast = timed("route.csv, fast decoder", load_legacy_fast, csv_path)
+        stored = timed("route.db", store.load_route)
+        store.close()
+
+        for waypoints in (fast, stored):
+            assert [w.body_names for w in waypoints] == [w.body_names for w in reference]
+
+
+if __name__ == '__main__':
+    main()
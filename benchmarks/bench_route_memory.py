@@ -0,0 +1,44 @@
+# Memory held by a route of 1M waypoints, as Waypoint objects in a Route
+# compared to the list of lists the plugin used before. Every system name is different,
+# as on a real route.
+import sys
+import tracemalloc
+
+import edmc_stubs  # noqa: F401
+import synthetic
+
+from SpanshRouter.Route import Route, Waypoint
+
+WAYPOINTS = 1000000
+
+
+def legacy_route(count):
+    return [[synthetic.system_name(i), str(3)] for i in range(count)]
+
+
+def slotted_route(count):
+    route = Route()
+    for i in range(count):
+        route.append(Waypoint(synthetic.system_name(i), 3))
+    return route
+
+
+def measure(build, count):
+    tracemalloc.start()
+    route = build(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del route
+    return current, peak
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else WAYPOINTS
+    for name, build in [("list of lists", legacy_route), ("Route", slotted_route)]:
+        current, peak = measure(build, count)
+        print(f"{name:<14} {current / 2 ** 20:8.1f} MiB held, {peak / 2 ** 20:8.1f} MiB peak, "
+              f"{current / count:6.1f} bytes per waypoint")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# Time EDMC spends in the plugin at startup: importing load.py and running
+# plugin_start, each run in a fresh interpreter. Fails when over the budget.
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROUNDS = 15
+# Milliseconds, from importing load.py to plugin_start returning
+BUDGET_MS = 40
+
+# Only needed once the user clicks something, none of these should load at startup
+DEFERRED = ["requests", "urllib3", "tkinter.filedialog", "tkinter.messagebox", "webbrowser",
+            "subprocess", "zipfile", "sqlite3", "ast", "numpy"]
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import sys
+sys.path.insert(0, {here!r})
+import edmc_stubs
+# Already loaded by EDMC itself by the time plugins start
+import json, logging, tkinter
+from time import perf_counter
+before = set(sys.modules)
+start = perf_counter()
+import load
+load.plugin_start({plugin_dir!r})
+elapsed = perf_counter() - start
+print(elapsed * 1000)
+print(' '.join(sorted(name for name in {deferred!r} if name in sys.modules and name not in before)))
+"""
+
+
+def main():
+    with tempfile.TemporaryDirectory() as plugin_dir:
+        with open(os.path.join(plugin_dir, "version.json"), 'w') as version_fd:
+            version_fd.write("1.0.0")
+
+        probe = PROBE.format(here=HERE, plugin_dir=plugin_dir, deferred=DEFERRED)
+        # A first run writes the bytecode caches, as an installed plugin would have them
+        subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True)
+
+        timings = []
+        loaded = ""
+        for i in range(ROUNDS):
+            output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True).stdout
+            elapsed, loaded = output.split("\n")[:2]
+            timings.append(float(elapsed))
+
+    median = statistics.median(timings)
+    print(f"plugin startup: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms "
+          f"(budget {BUDGET_MS} ms)")
+    if loaded:
+        print(f"loaded at startup but should be deferred: {loaded}")
+    if median > BUDGET_MS or loaded:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
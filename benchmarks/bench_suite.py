@@ -0,0 +1,138 @@
+# The route hot paths on synthetic routes of every kind, without EDMC or Tk:
+# import, save, restore, waypoint advances, bodies text and journal events.
+#
+#   python bench_suite.py [sizes...] [--kinds neutron,riches,...]
+#
+# Reports throughput for the bulk operations, p50/p95/p99 latencies for the
+# per-event ones, and the tracemalloc peak of the import.
+import os
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+import headless
+import synthetic
+
+import load
+
+SIZES = [1000, 10000, 100000]
+# Per-event operations are sampled, not run over the whole route
+SAMPLES = 2000
+
+
+def percentiles(timings):
+    if len(timings) < 2:
+        return timings * 3
+    cuts = statistics.quantiles(timings, n=100)
+    return cuts[49], cuts[94], cuts[98]
+
+
+def report(kind, count, name, elapsed=None, timings=None, peak=None):
+    line = f"{kind:<13} {count:>8}  {name:<18}"
+    if elapsed is not None:
+        line += f" {elapsed * 1000:10.1f} ms {count / elapsed:>12,.0f} waypoints/s"
+    if timings is not None:
+        p50, p95, p99 = percentiles(timings)
+        line += f" p50 {p50 * 1e6:8.1f} us  p95 {p95 * 1e6:8.1f} us  p99 {p99 * 1e6:8.1f} us"
+    if peak is not None:
+        line += f"  peak {peak / 1024 / 1024:8.1f} MiB"
+    print(line)
+
+
+def import_route(router, kind, path):
+    router.clear_route(False)
+    if kind == "edts":
+        for waypoint in router.read_edts(path):
+            router.add_waypoint(waypoint)
+    else:
+        router.plot_csv(path)
+
+
+def sample_offsets(count):
+    step = max(count // SAMPLES, 1)
+    return range(1, count, step)
+
+
+def bench(kind, count, folder):
+    write, extension = synthetic.WRITERS[kind]
+    path = os.path.join(folder, f"{kind}_{count}{extension}")
+    write(path, count)
+    plugin_dir = tempfile.mkdtemp(dir=folder)
+
+    router = headless.make_router(plugin_dir)
+    start = perf_counter()
+    import_route(router, kind, path)
+    elapsed = perf_counter() - start
+    waypoints = router.route.__len__()
+
+    tracemalloc.start()
+    import_route(router, kind, path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    report(kind, waypoints, "import", elapsed=elapsed, peak=peak)
+
+    start = perf_counter()
+    router.saved_route = None
+    router.save_route()
+    report(kind, waypoints, "save_route", elapsed=perf_counter() - start)
+
+    restored = headless.make_router(plugin_dir)
+    start = perf_counter()
+    restored.open_last_route()
+    headless.run_pending(wait=0)
+    report(kind, waypoints, "open_last_route", elapsed=perf_counter() - start)
+    assert restored.route.__len__() == waypoints
+
+    timings = []
+    for offset in sample_offsets(waypoints):
+        restored.offset = offset - 1
+        start = perf_counter()
+        restored.update_route(1)
+        timings.append(perf_counter() - start)
+    report(kind, waypoints, "update_route", timings=timings)
+
+    timings = []
+    for offset in sample_offsets(waypoints):
+        restored.offset = offset
+        start = perf_counter()
+        restored.update_bodies_text()
+        timings.append(perf_counter() - start)
+    report(kind, waypoints, "update_bodies_text", timings=timings)
+
+    # Arrivals a few systems ahead, as when jumping past waypoints
+    load.spansh_router = restored
+    restored.set_offset(0)
+    timings = []
+    for offset in sample_offsets(waypoints):
+        entry = {"event": "FSDJump", "StarSystem": restored.route[offset].system}
+        start = perf_counter()
+        load.journal_entry("Cmdr", False, entry["StarSystem"], None, entry, {})
+        timings.append(perf_counter() - start)
+    report(kind, waypoints, "journal_entry", timings=timings)
+    assert restored.offset == offset + 1
+
+    router.route_store.close()
+    restored.route_store.close()
+
+
+def main():
+    sizes = []
+    kinds = list(synthetic.WRITERS)
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg == "--kinds":
+            kinds = args.pop(0).split(",")
+        else:
+            sizes.append(int(arg))
+
+    with tempfile.TemporaryDirectory() as folder:
+        for count in sizes or SIZES:
+            for kind in kinds:
+                bench(kind, count, folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Widget updates and render time per waypoint advance, through the
+# ViewState renderer, on a fake Tk. Each route kind shows different labels.
+import sys
+from time import perf_counter
+
+import headless
+
+from SpanshRouter.Route import Waypoint
+
+WAYPOINTS = 2000
+
+ROUTES = {
+    "basic": lambda i: Waypoint(f"Synuefe AA-A h{i}", 3, distance_remaining=float(WAYPOINTS - i), fuel_used=1.5),
+    "riches": lambda i: Waypoint(f"Synuefe AA-A h{i}", 1, (f"Synuefe AA-A h{i} A 1",), ("Water world",),
+                                 scan_value=500000),
+    "fleetcarrier": lambda i: Waypoint(f"Synuefe AA-A h{i}", 1, restock=i % 10 == 0),
+    "galaxy": lambda i: Waypoint(f"Synuefe AA-A h{i}", 1, refuel=i % 5 == 0),
+}
+
+
+def bench(kind, make_waypoint, count):
+    router = headless.make_router()
+    router.clear_route(False)
+    router.route.kind = kind
+    for i in range(count):
+        router.add_waypoint(make_waypoint(i))
+    router.saved_route = router.route
+
+    headless.calls.clear()
+    renders, changes, render_time = router.view.renders, router.view.changes, router.view.render_time
+    start = perf_counter()
+    for offset in range(1, count):
+        router.set_offset(offset)
+    elapsed = perf_counter() - start
+
+    advances = count - 1
+    widget_calls = headless.calls["grid"] + headless.calls["grid_remove"] + headless.calls["config"]
+    print(f"{kind:<13} renders/advance {(router.view.renders - renders) / advances:.1f}  "
+          f"widget calls/advance {widget_calls / advances:.2f}  "
+          f"layout passes {headless.calls['update_idletasks']}  "
+          f"render {(router.view.render_time - render_time) / advances * 1e6:.1f} us  "
+          f"advance {elapsed / advances * 1e6:.1f} us")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else WAYPOINTS
+    for kind, make_waypoint in ROUTES.items():
+        bench(kind, make_waypoint, count)
+
+
+if __name__ == '__main__':
+    main()
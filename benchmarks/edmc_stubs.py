@@ -0,0 +1,35 @@
+# Minimal stand-ins for the EDMC modules the plugin imports, so its code can
+# be benchmarked without a running EDMC. Import this before anything from SpanshRouter.
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+class StubConfig(dict):
+    def get_int(self, key, default=0):
+        return self.get(key, default)
+
+    def get_str(self, key, default=None):
+        return self.get(key, default)
+
+    def get_list(self, key, default=None):
+        return self.get(key, default)
+
+
+class StubMonitor():
+    def __init__(self):
+        self.state = {'SystemName': None}
+
+
+config_module = types.ModuleType('config')
+config_module.appname = 'EDMarketConnector'
+config_module.config = StubConfig()
+sys.modules.setdefault('config', config_module)
+
+monitor_module = types.ModuleType('monitor')
+monitor_module.monitor = StubMonitor()
+sys.modules.setdefault('monitor', monitor_module)
@@ -0,0 +1,115 @@
+# A Tk-free SpanshRouter: every widget init_gui creates is replaced by a
+# FakeWidget that counts what is done to it, and after() callbacks are queued
+# until run_pending() is called. Import this instead of edmc_stubs.
+import os
+import tempfile
+import types
+from collections import Counter
+from time import sleep
+
+import edmc_stubs  # noqa: F401
+
+import SpanshRouter.SpanshRouter as router_module
+from SpanshRouter.Clipboard import Clipboard
+
+# Callbacks scheduled through after(), in order
+pending = []
+# Calls made on all fake widgets, by method name
+calls = Counter()
+
+
+class FakeVar():
+    def __init__(self, *args, value="", **kwargs):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+    def trace(self, *args):
+        pass
+
+
+class FakeWidget():
+    def __init__(self, *args, **options):
+        self.options = options
+        self.var = FakeVar()
+        self.placeholder = options.get("placeholder", args[1] if len(args) > 1 else "")
+
+    def grid(self, **kwargs):
+        calls["grid"] += 1
+
+    def grid_remove(self):
+        calls["grid_remove"] += 1
+
+    def config(self, **options):
+        calls["config"] += 1
+        self.options.update(options)
+
+    configure = config
+
+    def __setitem__(self, option, value):
+        calls["config"] += 1
+        self.options[option] = value
+
+    def __getitem__(self, option):
+        return self.options.get(option)
+
+    def update_idletasks(self):
+        calls["update_idletasks"] += 1
+
+    def after(self, ms, callback, *args):
+        pending.append((callback, args))
+
+    def get(self):
+        return self.var.get()
+
+    def set(self, value):
+        self.var.set(value)
+
+    def __getattr__(self, name):
+        # hide_list, set_text, put_placeholder and the like
+        return lambda *args, **kwargs: None
+
+
+class FakeClipboard(Clipboard):
+    def holds(self, text):
+        return True
+
+    def write(self, text):
+        calls["clipboard"] += 1
+
+
+fake_tk = types.SimpleNamespace(
+    Frame=FakeWidget, Button=FakeWidget, Label=FakeWidget, Scale=FakeWidget, StringVar=FakeVar,
+    NSEW="nsew", W="w", E="e", EW="ew", HORIZONTAL="horizontal", NORMAL="normal", DISABLED="disabled", END="end",
+)
+router_module.tk = fake_tk
+router_module.AutoCompleter = FakeWidget
+router_module.PlaceHolder = FakeWidget
+router_module.create_clipboard = lambda widget: FakeClipboard()
+
+
+def make_router(plugin_dir=None, gui=True):
+    if plugin_dir is None:
+        plugin_dir = tempfile.mkdtemp(prefix="spanshrouter-bench-")
+    version_file = os.path.join(plugin_dir, "version.json")
+    if not os.path.exists(version_file):
+        with open(version_file, 'w') as version_fd:
+            version_fd.write("1.0.0")
+
+    router = router_module.SpanshRouter(plugin_dir)
+    if gui:
+        router.init_gui(FakeWidget())
+    return router
+
+
+def run_pending(wait=0.001):
+    # Stands in for the Tk main loop until nothing is scheduled anymore
+    while pending:
+        callback, args = pending.pop(0)
+        callback(*args)
+        if pending:
+            sleep(wait)
@@ -0,0 +1,80 @@
+# Synthetic routes in the formats Spansh exports, and EDTS text output.
+import csv
+import random
+
+SUBTYPES = ["High metal content world", "Rocky body", "Water world", "Earth-like world", "Icy body"]
+
+
+def system_name(i):
+    # Names shaped like real procedurally generated ones, shared sector prefixes included
+    return f"Synuefe {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}-A h{i // 676}-{i % 97}"
+
+
+def write_neutron(path, count):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["System Name", "Distance To Arrival", "Distance Remaining", "Neutron Star", "Jumps"])
+        for i in range(count):
+            writer.writerow([system_name(i), 12.5, (count - i) * 250.0, "Yes" if i % 2 else "No", 1 + i % 4])
+
+
+def write_riches(path, count, bodies=3):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["System Name", "Body Name", "Body Subtype", "Is Terraformable", "Distance To Arrival",
+                         "Estimated Scan Value", "Estimated Mapping Value", "Jumps"])
+        for i in range(count):
+            name = system_name(i)
+            for b in range(bodies):
+                writer.writerow([name, f"{name} {chr(65 + b)} {b + 1}", SUBTYPES[(i + b) % len(SUBTYPES)],
+                                 "Yes" if b == 0 else "No", 150 * (b + 1), 21000, 480000, 1 + i % 3])
+
+
+def write_fleetcarrier(path, count):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["System Name", "Distance", "Distance Remaining", "Tritium in tank", "Tritium in market",
+                         "Fuel Used", "Icy Ring", "Pristine", "Restock Tritium"])
+        for i in range(count):
+            writer.writerow([system_name(i), 499.5, (count - i) * 499.5, 1000 - i % 900, 0, 110,
+                             "No", "No", "Yes" if i % 9 == 0 else "No"])
+
+
+def write_galaxy(path, count):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["System Name", "Distance", "Distance Remaining", "Fuel Left", "Fuel Used", "Refuel",
+                         "Neutron Star"])
+        for i in range(count):
+            writer.writerow([system_name(i), 62.3, (count - i) * 62.3, 28.5, 3.5, "Yes" if i % 6 == 0 else "No",
+                             "No"])
+
+
+def write_edts(path, count):
+    with open(path, 'w') as txtfile:
+        txtfile.write(f"Route from {system_name(0)} to {system_name(count - 1)}:\n\n")
+        for i in range(count):
+            txtfile.write(f"    === {245.5 * (i % 5 + 1):.2f}Ly ===> {i % 5 + 1} jumps ===> {system_name(i)}\n")
+
+
+def write_catalog(path, count, neutron=0.02, white_dwarf=0.03, seed=1):
+    # Stars spread over a slab of galaxy, 10000 x 1000 x 10000 ly, for the local plotter
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["name", "x", "y", "z", "neutron", "white_dwarf"])
+        for i in range(count):
+            kind = rng.random()
+            writer.writerow([system_name(i),
+                             f"{rng.uniform(0, 10000):.3f}", f"{rng.uniform(-500, 500):.3f}",
+                             f"{rng.uniform(0, 10000):.3f}", int(kind < neutron),
+                             int(neutron <= kind < neutron + white_dwarf)])
+
+
+WRITERS = {
+    "neutron": (write_neutron, ".csv"),
+    "riches": (write_riches, ".csv"),
+    "fleetcarrier": (write_fleetcarrier, ".csv"),
+    "galaxy": (write_galaxy, ".csv"),
+    "edts": (write_edts, ".txt"),
+}
@@ -1,5 +1,4 @@
-import tkinter.messagebox as confirmDialog
-
+from SpanshRouter.Metrics import metrics
 from SpanshRouter.SpanshRouter import SpanshRouter
 
 spansh_router = None
@@ -12,13 +11,17 @@ def plugin_start3(plugin_dir):
 def plugin_start(plugin_dir):
     global spansh_router
     spansh_router = SpanshRouter(plugin_dir)
-    spansh_router.check_for_update()
     return 'SpanshRouter'
 
 
 def plugin_stop():
     global spansh_router
+    if spansh_router.plot_engine:
+        spansh_router.plot_engine.shutdown()
     spansh_router.save_route()
+    spansh_router.route_store.close()
+    spansh_router.systems_cache.save()
+    metrics.stop()
 
     if spansh_router.update_available:
         spansh_router.install_update()
@@ -26,17 +29,21 @@ def plugin_stop():
 
 def journal_entry(cmdr, is_beta, system, station, entry, state):
     global spansh_router
-    if (entry['event'] in ['FSDJump', 'Location', 'SupercruiseEntry', 'SupercruiseExit']
-            and entry["StarSystem"].lower() == spansh_router.next_stop.lower()):
-        spansh_router.update_route()
-        spansh_router.set_source_ac(entry["StarSystem"])
-    elif entry['event'] == 'FSSDiscoveryScan' and entry['SystemName'] == spansh_router.next_stop:
-        spansh_router.update_route()
+    # Time spent on EDMC's journal thread, for every event
+    with metrics.timer("journal_entry"):
+        # Arriving at any system further down the route skips straight to it
+        if entry['event'] in ['FSDJump', 'Location', 'SupercruiseEntry', 'SupercruiseExit']:
+            # Jumps and logins also tell where we are, to find the way back to the route after a detour
+            if spansh_router.arrived_at(entry["StarSystem"], entry.get("StarPos")):
+                spansh_router.set_source_ac(entry["StarSystem"])
+        elif entry['event'] == 'FSSDiscoveryScan':
+            spansh_router.arrived_at(entry['SystemName'])
 
 
 def ask_for_update():
     global spansh_router
     if spansh_router.update_available:
+        import tkinter.messagebox as confirmDialog
         update_txt = "New Spansh Router update available!\n"
         update_txt += "If you choose to install it, you will have to restart EDMC for it to take effect.\n\n"
         update_txt += spansh_router.spansh_updater.changelogs
@@ -44,6 +51,7 @@ def ask_for_update():
         install_update = confirmDialog.askyesno("SpanshRouter", update_txt)
 
         if install_update:
+            spansh_router.prepare_update()
             confirmDialog.showinfo("SpanshRouter", "The update will be installed as soon as you quit EDMC.")
         else:
             spansh_router.update_available = False
@@ -53,5 +61,6 @@ def plugin_app(parent):
     global spansh_router
     frame = spansh_router.init_gui(parent)
     spansh_router.open_last_route()
-    parent.master.after_idle(ask_for_update)
+    # Asks about the update once the check running in the background finds one
+    spansh_router.check_for_update(ask_for_update)
     return frame